@@ -3,7 +3,7 @@ import boto3
 import os
 import time
 import json
-from flask import Flask, render_template, request, jsonify, session, send_from_directory, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, send_from_directory, redirect, url_for, make_response, Response, stream_with_context
 from flask_limiter import Limiter
 from flask_session import Session
 import pandas as pd
@@ -18,6 +18,31 @@ from bs4 import BeautifulSoup
 import re
 from datetime import datetime, timezone, timedelta
 import pytz
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from candle_db import (
+    TICKERS, CHART_TIMEFRAMES, REGULAR_SESSION_START_SECONDS, get_db_paths, load_day_candles_sqlite, candle_pool,
+    tickers_query, filter_regular_hours, resample_candles
+)
+from shard_manifest import ShardManifest
+from rollups import load_rollup
+from date_catalog import DateCatalog
+from chart_wire import (
+    COMPACT_CONTENT_TYPE, COMPACT_STREAM_CONTENT_TYPE, wants_compact, chart_data_dict,
+    encode_chart_compact, stream_frame
+)
+from candle_store import COLUMNAR_DIR, CANDLE_BACKEND, CandleStore
+from chart_cache import ChartCache, data_version
+from http_cache import conditional_get, file_version
+from overlay import align_overlay, overlay_dict, encode_overlay_compact
+from indicators import parse_indicators, compute_indicators
+from replay_stream import frame_columns, session_bounds, cursor_for_time, replay_events
+from downsample import MIN_MAX_POINTS, downsample_frame, parse_max_points
+from gap_table import GapTable, PREVIOUS_HIGH_LOW_CATEGORY_COLUMNS, load_previous_high_low_frame
+from gap_insights import GAP_INSIGHT_COLUMNS, insight_stats
+from gap_query import is_gap_query, parse_gap_query
+from gap_builder import gap_data_path as built_gap_data_path, load_range_candles
+from gap_backtest import candle_matrix, parse_backtest_rules, backtest_gap_days
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -362,29 +387,34 @@ def upload_users_db():
     except Exception as e:
         logging.error(f"Failed to upload users.db to S3: {str(e)}")
 
-TICKERS = ['QQQ', 'AAPL', 'MSFT', 'TSLA', 'ORCL', 'NVDA', 'MSTR', 'UBER', 'PLTR', 'META']
-DB_DIR = os.path.join(DATA_DIR, "db")
 GAP_DATA_PATH = os.path.join(DATA_DIR, "qqq_central_data_updated.csv")
 EVENTS_DATA_PATH = os.path.join(DATA_DIR, "news_events.csv")
 EARNINGS_DATA_PATH = os.path.join(DATA_DIR, "earnings_data.csv")
 ECONOMIC_DATA_BINNED_PATH = os.path.join(DATA_DIR, "economic_data_binned.csv")
 
-QQQ_DB_PATHS = [
-    os.path.join(DB_DIR, "stock_data_qqq_part1.db"),
-    os.path.join(DB_DIR, "stock_data_qqq_part2.db"),
-    os.path.join(DB_DIR, "stock_data_qqq_part3.db")
-]
+PREVIOUS_HIGH_LOW_PATH = os.path.join(DATA_DIR, "previuos_high_low.csv")
+
+gap_table = GapTable(GAP_DATA_PATH)
+gap_tables = {'QQQ': gap_table}
+previous_high_low_table = GapTable(PREVIOUS_HIGH_LOW_PATH, loader=load_previous_high_low_frame,
+                                   group_columns=PREVIOUS_HIGH_LOW_CATEGORY_COLUMNS)
+
+candle_store = CandleStore(COLUMNAR_DIR)
+# Requests rescan stale shards in memory only; the manifest file is written by the offline tools
+shard_manifest = ShardManifest(persist=False)
+chart_cache = ChartCache()
 
 VALID_TICKERS = []
 
-def get_db_paths(ticker):
-    if ticker not in TICKERS:
-        logging.error(f"Invalid ticker requested: {ticker}")
-        return []
-    if ticker == 'QQQ':
-        return [path for path in QQQ_DB_PATHS if os.path.exists(path)]
-    db_path = os.path.join(DB_DIR, f"stock_data_{ticker.lower()}.db")
-    return [db_path] if os.path.exists(db_path) else []
+def load_day_candles(ticker, target_date):
+    """Load one day of 1-minute candles from the configured storage backend"""
+    if CANDLE_BACKEND == 'columnar':
+        df = candle_store.load_day(ticker, target_date)
+        if df is not None:
+            return df
+        logging.debug(f"{ticker} {target_date} not in columnar store, falling back to SQLite")
+    db_paths = shard_manifest.shards_for_date(ticker, get_db_paths(ticker), target_date)
+    return load_day_candles_sqlite(ticker, target_date, db_paths)
 
 def initialize_tickers():
     global VALID_TICKERS
@@ -397,13 +427,12 @@ def initialize_tickers():
             continue
         try:
             for db_path in db_paths:
-                conn = sqlite3.connect(db_path)
-                cursor = conn.cursor()
-                cursor.execute("SELECT DISTINCT ticker FROM candles")
-                db_tickers = [row[0] for row in cursor.fetchall()]
+                with candle_pool.connection(db_path) as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(tickers_query(conn, db_path))
+                    db_tickers = [row[0] for row in cursor.fetchall()]
                 if db_tickers and ticker not in VALID_TICKERS:
                     VALID_TICKERS.append(ticker)
-                conn.close()
                 logging.debug(f"Validated ticker {ticker} in {db_path}")
         except Exception as e:
             logging.warning(f"Could not access database for {ticker}: {str(e)}")
@@ -451,8 +480,17 @@ def get_sample_event_types():
     """Return limited event types for sample mode"""
     return ['CPI', 'FOMC']
 
+date_catalog = DateCatalog(sample_filter=filter_dates_for_sample)
+
 with app.app_context():
+    shard_manifest.refresh()
     initialize_tickers()
+    date_catalog.warm(VALID_TICKERS)
+    if os.path.exists(GAP_DATA_PATH):
+        try:
+            gap_table.insight_cube()
+        except Exception as e:
+            logging.error(f"Error building gap insight cube: {str(e)}")
 
 @app.route('/ads.txt')
 def serve_ads_txt():
@@ -746,22 +784,15 @@ def get_valid_dates():
         logging.error(f"No database available for {ticker}")
         return jsonify({'error': f'No database available for {ticker}'}), 404
     try:
-        dates = set()
-        for db_path in db_paths:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT DATE(timestamp) AS date FROM candles WHERE ticker = ?", (ticker,))
-            dates.update(row[0] for row in cursor.fetchall())
-            conn.close()
-        logging.debug(f"Found {len(dates)} dates for {ticker}")
-        if not dates:
+        # Served from the precomputed catalog; sample-mode filtering is precomputed too
+        dates_list = date_catalog.dates(ticker)
+        logging.debug(f"Found {len(dates_list)} dates for {ticker}")
+        if not dates_list:
             logging.warning(f"No dates available for {ticker}")
             return jsonify({'error': f'No dates available for {ticker}'}), 404
         
-        # Filter dates for sample mode
-        dates_list = sorted(dates)
         if is_sample_mode():
-            dates_list = filter_dates_for_sample(dates_list)
+            dates_list = date_catalog.dates(ticker, sample_mode=True)
             logging.debug(f"Filtered to {len(dates_list)} dates for sample mode")
         
         return jsonify({'dates': dates_list})
@@ -769,8 +800,102 @@ def get_valid_dates():
         logging.error(f"Error fetching dates for {ticker}: {str(e)}")
         return jsonify({'error': f'Failed to fetch dates for {ticker}'}), 500
 
+# Cache-Control for chart days that are already over; set a public policy when serving behind a CDN
+CHART_HISTORICAL_CACHE_CONTROL = os.environ.get('CHART_HISTORICAL_CACHE_CONTROL', 'private, max-age=604800')
+
+def chart_validator():
+    """Data version and Cache-Control for a chart request, or None if its parameters are invalid"""
+    ticker = request.args.get('ticker')
+    if ticker not in TICKERS:
+        return None
+    try:
+        target_date = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return None
+    version = f"{data_version(ticker)}:{'compact' if wants_compact(request) else 'json'}"
+    if target_date < datetime.now(pytz.timezone('America/New_York')).date():
+        return version, CHART_HISTORICAL_CACHE_CONTROL
+    return version, 'no-cache'
+
+def csv_validator(path):
+    """Validator for the CSV-backed date lists; sample mode is decided by Referer, so clients always revalidate"""
+    return lambda: (f"{file_version(path)}:{'sample' if is_sample_mode() else 'main'}", 'no-cache')
+
+def gap_ticker():
+    return (request.args.get('ticker') or 'QQQ').upper()
+
+def gap_data_path(ticker):
+    """The curated QQQ gap CSV, or the one gap_builder.py generated for another ticker"""
+    return GAP_DATA_PATH if ticker == 'QQQ' else built_gap_data_path(ticker)
+
+def get_gap_table(ticker):
+    table = gap_tables.get(ticker)
+    if table is None:
+        table = gap_tables.setdefault(ticker, GapTable(gap_data_path(ticker)))
+    return table
+
+def gap_csv_validator():
+    """csv_validator for the gap CSV of the requested ticker"""
+    ticker = gap_ticker()
+    if ticker not in TICKERS:
+        return None
+    return csv_validator(gap_data_path(ticker))()
+
+def load_chart_frame(ticker, target_date, timeframe, restrict_hours, replay_mode):
+    """Candles for one chart day with get_chart's restrict_hours/timeframe/replay semantics applied"""
+    # For replay mode, always return 1-minute data for client-side aggregation
+    # For non-replay mode, serve the materialized rollup when one exists
+    df = None
+    if not replay_mode and timeframe > 1:
+        df = load_rollup(ticker, target_date, timeframe, restrict_hours)
+        if df is not None:
+            logging.debug(f"Loaded {timeframe}-minute rollup for {ticker} on {target_date}, shape: {df.shape}")
+
+    if df is None:
+        df = load_day_candles(ticker, target_date)
+        logging.debug(f"Loaded data shape for {ticker} on {target_date}: {df.shape}")
+
+        # Filter to regular market hours (9:30 AM to 4:00 PM) if restrict_hours is True
+        if restrict_hours:
+            df = filter_regular_hours(df)
+            logging.debug(f"Filtered to regular hours, new shape: {df.shape}")
+
+        # Resample to the requested timeframe if not 1 minute and no rollup was found
+        if not replay_mode and timeframe > 1:
+            df = resample_candles(df, timeframe)
+            logging.debug(f"Resampled data to {timeframe}-minute timeframe, new shape: {df.shape}")
+    return df
+
+def encode_chart_payload(df, ticker, date, compact, indicator_names=(), max_points=None):
+    """Encode a chart frame (and its requested indicators) as the compact binary body or the single-line JSON body.
+
+    With max_points the bars are LTTB-downsampled for an overview; indicators are
+    computed on the full series first and sampled at the kept bars.
+    """
+    indicators = compute_indicators(df, indicator_names) if indicator_names else None
+    extra = None
+    if max_points is not None and len(df) > max_points:
+        source_count = len(df)
+        df, kept = downsample_frame(df, max_points)
+        if indicators:
+            indicators = {name: values[kept] for name, values in indicators.items()}
+        extra = {'downsampled': True, 'source_count': source_count}
+    if compact:
+        return encode_chart_compact(df, ticker, date, extra_header=extra, indicators=indicators)
+    # Always one compact line (jsonify pretty-prints in debug), so NDJSON framing holds
+    body = json.dumps({'chart_data': chart_data_dict(df, ticker, date, indicators, extra)}, separators=(',', ':'), sort_keys=True)
+    return f"{body}\n".encode('utf-8')
+
+def chart_payload_response(payload, compact):
+    """Wrap an encoded chart body (compact binary or JSON) in a response"""
+    response = make_response(payload)
+    response.headers['Content-Type'] = COMPACT_CONTENT_TYPE if compact else 'application/json'
+    response.headers['Vary'] = 'Accept'
+    return response
+
 @app.route('/api/stock/chart', methods=['GET'])
 @limiter.limit("10 per 12 hours")
+@conditional_get(chart_validator, vary='Accept')
 def get_chart():
     # Check action limits for button clicks
     if is_sample_mode():
@@ -807,7 +932,7 @@ def get_chart():
             return jsonify({'error': 'Invalid ticker'}), 400
         try:
             timeframe = int(timeframe)
-            if timeframe not in [1, 2, 3, 5, 10, 15, 30, 60, 240]:
+            if timeframe not in CHART_TIMEFRAMES:
                 return jsonify({'error': 'Invalid timeframe. Must be 1, 2, 3, 5, 10, 15, 30, 60 or 240 minutes.'}), 400
         except ValueError:
             return jsonify({'error': 'Invalid timeframe format'}), 400
@@ -815,49 +940,24 @@ def get_chart():
             target_date = pd.to_datetime(date).date()
         except ValueError:
             return jsonify({'error': 'Invalid date format'}), 400
+        try:
+            indicator_names = tuple(parse_indicators(request.args.get('indicators')))
+            # Overview downsampling never applies to replay, which needs every 1-minute bar
+            max_points = None if replay_mode else parse_max_points(request.args.get('max_points'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         db_paths = get_db_paths(ticker)
         if not db_paths:
             return jsonify({'error': f'No database available for {ticker}'}), 404
+        compact = wants_compact(request)
+        cache_key = (ticker, date, timeframe, restrict_hours, replay_mode, 'compact' if compact else 'json', indicator_names, max_points)
+        version = data_version(ticker)
+        payload = chart_cache.get(cache_key, version)
+        if payload is not None:
+            logging.debug(f"Serving cached chart payload for {cache_key}")
+            return chart_payload_response(payload, compact)
         try:
-            df_list = []
-            query = """
-                SELECT timestamp, open, high, low, close, volume
-                FROM candles
-                WHERE ticker = ? AND DATE(timestamp) = ?
-                ORDER BY timestamp
-            """
-            for db_path in db_paths:
-                conn = sqlite3.connect(db_path)
-                df = pd.read_sql_query(query, conn, params=(ticker, str(target_date)), parse_dates=['timestamp'])
-                df_list.append(df)
-                conn.close()
-            df = pd.concat(df_list, ignore_index=True)
-            df = df.sort_values('timestamp')
-            logging.debug(f"Loaded data shape for {ticker} on {date}: {df.shape}")
-
-            # Filter to regular market hours (9:30 AM to 4:00 PM) if restrict_hours is True
-            if restrict_hours:
-                df['time'] = df['timestamp'].dt.time
-                start_time = pd.to_datetime('09:30:00').time()
-                end_time = pd.to_datetime('16:00:00').time()
-                df = df[(df['time'] >= start_time) & (df['time'] <= end_time)]
-                df = df.drop(columns=['time'])  # Remove temporary time column
-                logging.debug(f"Filtered to regular hours, new shape: {df.shape}")
-
-            # For replay mode, always return 1-minute data for client-side aggregation
-            # For non-replay mode, resample to the requested timeframe if not 1 minute
-            if not replay_mode and timeframe > 1:
-                df.set_index('timestamp', inplace=True)
-                df = df.resample(f'{timeframe}T').agg({
-                    'open': 'first',
-                    'high': 'max',
-                    'low': 'min',
-                    'close': 'last',
-                    'volume': 'sum'
-                }).dropna()
-                df.reset_index(inplace=True)
-                logging.debug(f"Resampled data to {timeframe}-minute timeframe, new shape: {df.shape}")
-
+            df = load_chart_frame(ticker, target_date, timeframe, restrict_hours, replay_mode)
         except Exception as e:
             logging.error(f"Error querying database for {ticker}: {str(e)}")
             return jsonify({'error': 'Database query failed'}), 500
@@ -867,25 +967,317 @@ def get_chart():
         if not all(col in df.columns for col in required_columns):
             return jsonify({'error': 'Invalid data format'}), 400
 
-        df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        chart_data = {
-            'timestamp': df['timestamp'].tolist(),
-            'open': df['open'].tolist(),
-            'high': df['high'].tolist(),
-            'low': df['low'].tolist(),
-            'close': df['close'].tolist(),
-            'volume': df['volume'].tolist(),
-            'ticker': ticker,
-            'date': date,
-            'count': len(df)  # Update count to reflect filtered/resampled data
-        }
-        return jsonify({'chart_data': chart_data})
+        payload = encode_chart_payload(df, ticker, date, compact, indicator_names, max_points)
+        chart_cache.put(cache_key, version, payload)
+        return chart_payload_response(payload, compact)
     except Exception as e:
         logging.error(f"Unexpected error in get_chart: {str(e)}")
         return jsonify({'error': 'Server error'}), 500
 
+# Longest calendar span /api/stock/chart_range will stream in one request
+CHART_RANGE_MAX_DAYS = int(os.environ.get('CHART_RANGE_MAX_DAYS', 366))
+
+def chart_day_payload(ticker, date, timeframe, restrict_hours, compact, version, max_points=None):
+    """Encoded chart body for one trading day (through the payload cache), or None when the day is empty"""
+    cache_key = (ticker, date, timeframe, restrict_hours, False, 'compact' if compact else 'json', (), max_points)
+    payload = chart_cache.get(cache_key, version)
+    if payload is None:
+        df = load_chart_frame(ticker, pd.Timestamp(date).date(), timeframe, restrict_hours, False)
+        if df.empty:
+            return None
+        payload = encode_chart_payload(df, ticker, date, compact, max_points=max_points)
+        chart_cache.put(cache_key, version, payload)
+    return payload
+
+@app.route('/api/stock/chart_range', methods=['GET'])
+@limiter.limit("10 per 12 hours")
+def get_chart_range():
+    """Stream every trading day in [start, end] as NDJSON chart_data lines or length-prefixed compact payloads"""
+    # Check action limits for button clicks
+    if is_sample_mode():
+        # Sample mode - check sample action limit
+        sample_action = request.args.get('sample_action')
+        if sample_action == 'load_chart':
+            if not check_sample_action_limit():
+                logging.info(f"Sample mode action limit exceeded for session: {session.get('user_id')}")
+                return jsonify({
+                    'error': 'Sample limit reached: You\'ve used your 3 free action buttons. Sign up FREE for unlimited access!',
+                    'limit_reached': True
+                }), 429
+    else:
+        # Main site - check main action limit
+        main_action = request.args.get('main_action')
+        if main_action == 'load_chart':
+            if not check_main_action_limit():
+                logging.info(f"Main action limit exceeded for user: {session.get('user_id')}")
+                return jsonify({
+                    'error': 'Action limit reached: You\'ve used your 10 free action buttons. Please wait 12 hours or upgrade your plan.',
+                    'limit_reached': True
+                }), 429
+
+    try:
+        ticker = request.args.get('ticker')
+        start = request.args.get('start')
+        end = request.args.get('end')
+        timeframe = request.args.get('timeframe', '1')
+        restrict_hours = request.args.get('restrict_hours', 'false').lower() == 'true'
+        logging.debug(f"Processing chart range request for ticker={ticker}, start={start}, end={end}, timeframe={timeframe}, restrict_hours={restrict_hours}")
+        if not ticker or not start or not end:
+            return jsonify({'error': 'Missing ticker, start, or end'}), 400
+        if ticker not in TICKERS:
+            return jsonify({'error': 'Invalid ticker'}), 400
+        try:
+            timeframe = int(timeframe)
+            if timeframe not in CHART_TIMEFRAMES:
+                return jsonify({'error': 'Invalid timeframe. Must be 1, 2, 3, 5, 10, 15, 30, 60 or 240 minutes.'}), 400
+        except ValueError:
+            return jsonify({'error': 'Invalid timeframe format'}), 400
+        try:
+            start_date = datetime.strptime(start, '%Y-%m-%d').date()
+            end_date = datetime.strptime(end, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD.'}), 400
+        if end_date < start_date:
+            return jsonify({'error': 'End date must not be before start date'}), 400
+        if (end_date - start_date).days > CHART_RANGE_MAX_DAYS:
+            return jsonify({'error': f'Date range too long. Maximum is {CHART_RANGE_MAX_DAYS} days.'}), 400
+        dates = date_catalog.dates_between(ticker, start_date, end_date)
+        if dates is None:
+            return jsonify({'error': f'No database available for {ticker}'}), 404
+        if is_sample_mode():
+            dates = filter_dates_for_sample(dates)
+        if not dates:
+            return jsonify({'error': 'No trading days in the selected range.'}), 404
+        try:
+            max_points = parse_max_points(request.args.get('max_points'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        # Spread the overview budget evenly over the streamed days; each day needs at least MIN_MAX_POINTS
+        day_max_points = None
+        if max_points is not None:
+            if max_points < len(dates) * MIN_MAX_POINTS:
+                return jsonify({'error': f'max_points must be at least {len(dates) * MIN_MAX_POINTS} for {len(dates)} trading days'}), 400
+            day_max_points = max_points // len(dates)
+    except Exception as e:
+        logging.error(f"Unexpected error in get_chart_range: {str(e)}")
+        return jsonify({'error': 'Server error'}), 500
+
+    compact = wants_compact(request, COMPACT_STREAM_CONTENT_TYPE, 'application/x-ndjson')
+    version = data_version(ticker)
+
+    def generate():
+        # Days are sorted, so consecutive days hit the same shard; only one day is in memory at a time
+        for date in dates:
+            try:
+                payload = chart_day_payload(ticker, date, timeframe, restrict_hours, compact, version, day_max_points)
+            except Exception as e:
+                logging.error(f"Error loading {ticker} on {date} for chart range: {str(e)}")
+                continue
+            if payload is not None:
+                yield stream_frame(payload) if compact else payload
+
+    response = Response(stream_with_context(generate()),
+                        mimetype=COMPACT_STREAM_CONTENT_TYPE if compact else 'application/x-ndjson')
+    response.headers['Vary'] = 'Accept'
+    return response
+
+def load_overlay_frame(ticker, dates, timeframe, restrict_hours):
+    """Concatenated chart frames of one ticker over the given trading days"""
+    frames = [load_chart_frame(ticker, pd.Timestamp(date).date(), timeframe, restrict_hours, False) for date in dates]
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+@app.route('/api/stock/overlay', methods=['GET'])
+@limiter.limit("10 per 12 hours")
+def get_overlay():
+    """Several tickers for one date (or start/end range) aligned on a shared timestamp axis"""
+    # Check action limits for button clicks
+    if is_sample_mode():
+        # Sample mode - check sample action limit
+        sample_action = request.args.get('sample_action')
+        if sample_action == 'load_chart':
+            if not check_sample_action_limit():
+                logging.info(f"Sample mode action limit exceeded for session: {session.get('user_id')}")
+                return jsonify({
+                    'error': 'Sample limit reached: You\'ve used your 3 free action buttons. Sign up FREE for unlimited access!',
+                    'limit_reached': True
+                }), 429
+    else:
+        # Main site - check main action limit
+        main_action = request.args.get('main_action')
+        if main_action == 'load_chart':
+            if not check_main_action_limit():
+                logging.info(f"Main action limit exceeded for user: {session.get('user_id')}")
+                return jsonify({
+                    'error': 'Action limit reached: You\'ve used your 10 free action buttons. Please wait 12 hours or upgrade your plan.',
+                    'limit_reached': True
+                }), 429
+
+    try:
+        tickers = list(dict.fromkeys(t.strip().upper() for t in request.args.get('tickers', '').split(',') if t.strip()))
+        date = request.args.get('date')
+        start = request.args.get('start', date)
+        end = request.args.get('end', date)
+        timeframe = request.args.get('timeframe', '1')
+        restrict_hours = request.args.get('restrict_hours', 'false').lower() == 'true'
+        normalize = request.args.get('normalize', 'false').lower() in ('true', 'percent')
+        logging.debug(f"Processing overlay request for tickers={tickers}, start={start}, end={end}, timeframe={timeframe}, restrict_hours={restrict_hours}, normalize={normalize}")
+        if not tickers or not start or not end:
+            return jsonify({'error': 'Missing tickers, or date / start and end'}), 400
+        allowed_tickers = get_sample_tickers() if is_sample_mode() else TICKERS
+        invalid = [ticker for ticker in tickers if ticker not in allowed_tickers]
+        if invalid:
+            return jsonify({'error': f'Invalid ticker: {", ".join(invalid)}'}), 400
+        try:
+            timeframe = int(timeframe)
+            if timeframe not in CHART_TIMEFRAMES:
+                return jsonify({'error': 'Invalid timeframe. Must be 1, 2, 3, 5, 10, 15, 30, 60 or 240 minutes.'}), 400
+        except ValueError:
+            return jsonify({'error': 'Invalid timeframe format'}), 400
+        try:
+            start_date = datetime.strptime(start, '%Y-%m-%d').date()
+            end_date = datetime.strptime(end, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD.'}), 400
+        if end_date < start_date:
+            return jsonify({'error': 'End date must not be before start date'}), 400
+        if (end_date - start_date).days > CHART_RANGE_MAX_DAYS:
+            return jsonify({'error': f'Date range too long. Maximum is {CHART_RANGE_MAX_DAYS} days.'}), 400
+
+        ticker_dates = {}
+        for ticker in tickers:
+            dates = date_catalog.dates_between(ticker, start_date, end_date) or []
+            ticker_dates[ticker] = filter_dates_for_sample(dates) if is_sample_mode() else dates
+        try:
+            # Each ticker lives in its own shard files, so they are read concurrently
+            with ThreadPoolExecutor(max_workers=len(tickers), thread_name_prefix='overlay') as pool:
+                results = pool.map(lambda t: load_overlay_frame(t, ticker_dates[t], timeframe, restrict_hours), tickers)
+                frames = {ticker: df for ticker, df in zip(tickers, results) if df is not None}
+        except Exception as e:
+            logging.error(f"Error querying database for overlay {tickers}: {str(e)}")
+            return jsonify({'error': 'Database query failed'}), 500
+        if not frames:
+            return jsonify({'error': 'No data available for the selected date. Try another date.'}), 404
+
+        axis, series = align_overlay(frames, normalize)
+        logging.debug(f"Aligned {len(series)} overlay series on {len(axis)} timestamps")
+        if wants_compact(request):
+            response = make_response(encode_overlay_compact(axis, series, normalize))
+            response.headers['Content-Type'] = COMPACT_CONTENT_TYPE
+        else:
+            response = jsonify({'overlay': overlay_dict(axis, series, normalize)})
+        response.headers['Vary'] = 'Accept'
+        return response
+    except Exception as e:
+        logging.error(f"Unexpected error in get_overlay: {str(e)}")
+        return jsonify({'error': 'Server error'}), 500
+
+# Replay stream pacing: default/minimum milliseconds per replayed minute, and how long one
+# connection may stream before it sends a pause cursor. A stream holds one gunicorn thread
+# (start.sh runs gthread workers) while it sleeps between bars, so this bounds how long a
+# client keeps that thread; a sync worker would be blocked for the whole stream.
+REPLAY_STREAM_INTERVAL_MS = int(os.environ.get('REPLAY_STREAM_INTERVAL_MS', 1000))
+REPLAY_STREAM_MIN_INTERVAL_MS = int(os.environ.get('REPLAY_STREAM_MIN_INTERVAL_MS', 50))
+REPLAY_STREAM_MAX_SECONDS = int(os.environ.get('REPLAY_STREAM_MAX_SECONDS', 120))
+
+@functools.lru_cache(maxsize=16)
+def cached_replay_day(ticker, date, version):
+    """Read-only day columns shared by every replay stream of the same day and data version"""
+    return frame_columns(load_day_candles(ticker, pd.Timestamp(date).date()))
+
+def replay_day_columns(ticker, date):
+    if CANDLE_BACKEND == 'columnar':
+        columns = candle_store.day_slice(ticker, date)
+        if columns is not None:
+            return columns  # views into the memory-mapped store
+    return cached_replay_day(ticker, date, data_version(ticker))
+
+# Paused and seeking clients reconnect, so this allows more requests than the one-shot chart endpoint
+@app.route('/api/stock/replay_stream', methods=['GET'])
+@limiter.limit("60 per hour")
+def get_replay_stream():
+    """Stream a stored day minute by minute as Server-Sent Events for the replay simulator"""
+    # Check action limits for button clicks (the same load_chart budget as get_chart)
+    if is_sample_mode():
+        # Sample mode - check sample action limit
+        sample_action = request.args.get('sample_action')
+        if sample_action == 'load_chart':
+            if not check_sample_action_limit():
+                logging.info(f"Sample mode action limit exceeded for session: {session.get('user_id')}")
+                return jsonify({
+                    'error': 'Sample limit reached: You\'ve used your 3 free action buttons. Sign up FREE for unlimited access!',
+                    'limit_reached': True
+                }), 429
+    else:
+        # Main site - check main action limit
+        main_action = request.args.get('main_action')
+        if main_action == 'load_chart':
+            if not check_main_action_limit():
+                logging.info(f"Main action limit exceeded for user: {session.get('user_id')}")
+                return jsonify({
+                    'error': 'Action limit reached: You\'ve used your 10 free action buttons. Please wait 12 hours or upgrade your plan.',
+                    'limit_reached': True
+                }), 429
+
+    try:
+        ticker = request.args.get('ticker')
+        date = request.args.get('date')
+        timeframe = request.args.get('timeframe', '1')
+        restrict_hours = request.args.get('restrict_hours', 'false').lower() == 'true'
+        logging.debug(f"Processing replay stream for ticker={ticker}, date={date}, timeframe={timeframe}, restrict_hours={restrict_hours}")
+        if not ticker or not date:
+            return jsonify({'error': 'Missing ticker or date'}), 400
+        if ticker not in TICKERS:
+            return jsonify({'error': 'Invalid ticker'}), 400
+        try:
+            timeframe = int(timeframe)
+            if timeframe not in CHART_TIMEFRAMES:
+                return jsonify({'error': 'Invalid timeframe. Must be 1, 2, 3, 5, 10, 15, 30, 60 or 240 minutes.'}), 400
+        except ValueError:
+            return jsonify({'error': 'Invalid timeframe format'}), 400
+        try:
+            date = datetime.strptime(date, '%Y-%m-%d').strftime('%Y-%m-%d')
+            interval_ms = max(int(request.args.get('interval_ms', REPLAY_STREAM_INTERVAL_MS)), REPLAY_STREAM_MIN_INTERVAL_MS)
+        except ValueError:
+            return jsonify({'error': 'Invalid date or interval format'}), 400
+        if not get_db_paths(ticker):
+            return jsonify({'error': f'No database available for {ticker}'}), 404
+        try:
+            columns = replay_day_columns(ticker, date)
+        except Exception as e:
+            logging.error(f"Error querying database for {ticker}: {str(e)}")
+            return jsonify({'error': 'Database query failed'}), 500
+        lo, hi = session_bounds(columns['timestamp'], restrict_hours)
+        if hi <= lo:
+            return jsonify({'error': 'No data available for the selected date. Try another date.'}), 404
+
+        # Seek: explicit cursor, then a browser reconnect's Last-Event-ID, then start_time=HH:MM
+        cursor = 0
+        try:
+            if request.args.get('cursor') is not None:
+                cursor = int(request.args.get('cursor'))
+            elif request.headers.get('Last-Event-ID'):
+                cursor = int(request.headers.get('Last-Event-ID')) + 1
+            elif request.args.get('start_time'):
+                cursor = cursor_for_time(columns['timestamp'], lo, hi, request.args.get('start_time'))
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor or start_time'}), 400
+    except Exception as e:
+        logging.error(f"Unexpected error in get_replay_stream: {str(e)}")
+        return jsonify({'error': 'Server error'}), 500
+
+    header = {'ticker': ticker, 'date': date, 'timeframe': timeframe}
+    events = replay_events(columns, lo, hi, timeframe, cursor, interval_ms / 1000, REPLAY_STREAM_MAX_SECONDS, header)
+    response = Response(events, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/gaps', methods=['GET'])
 @limiter.limit("10 per 12 hours")
+@conditional_get(gap_csv_validator)
 def get_gaps():
     # Check action limits for button clicks
     if is_sample_mode():
@@ -910,27 +1302,28 @@ def get_gaps():
                 }), 429
     
     try:
+        ticker = gap_ticker()
+        if ticker not in TICKERS:
+            return jsonify({'error': 'Invalid ticker'}), 400
+        gap_data_file = gap_data_path(ticker)
+        table = get_gap_table(ticker)
         gap_size = request.args.get('gap_size')
         day = request.args.get('day')
         gap_direction = request.args.get('gap_direction')
-        logging.debug(f"Fetching gaps for gap_size={gap_size}, day={day}, gap_direction={gap_direction}")
-        if not os.path.exists(GAP_DATA_PATH):
-            logging.error(f"Gap data file not found: {GAP_DATA_PATH}")
+        logging.debug(f"Fetching {ticker} gaps for gap_size={gap_size}, day={day}, gap_direction={gap_direction}")
+        if not os.path.exists(gap_data_file):
+            logging.error(f"Gap data file not found: {gap_data_file}")
             return jsonify({'error': 'Gap data file not found. Please contact support.'}), 404
         try:
-            df = pd.read_csv(GAP_DATA_PATH)
+            df = table.frame()
             logging.debug(f"Loaded gap data with shape: {df.shape}")
         except Exception as e:
-            logging.error(f"Error reading gap data file {GAP_DATA_PATH}: {str(e)}")
+            logging.error(f"Error reading gap data file {gap_data_file}: {str(e)}")
             return jsonify({'error': f'Failed to load gap data: {str(e)}'}), 500
         if 'date' not in df.columns or 'gap_size_bin' not in df.columns or 'day_of_week' not in df.columns or 'gap_direction' not in df.columns:
             logging.error("Invalid gap data format: missing required columns")
             return jsonify({'error': 'Invalid gap data format'}), 400
-        filtered_df = df[
-            (df['gap_size_bin'] == gap_size) &
-            (df['day_of_week'] == day) &
-            (df['gap_direction'] == gap_direction)
-        ]
+        filtered_df = table.select(gap_size, day, gap_direction)
         dates = filtered_df['date'].tolist()
         logging.debug(f"Filtered DataFrame shape: {filtered_df.shape}")
         if not dates:
@@ -948,6 +1341,139 @@ def get_gaps():
         logging.error(f"Error processing gaps: {str(e)}")
         return jsonify({'error': 'Server error'}), 500
 
+@app.route('/api/gaps/query', methods=['GET'])
+@limiter.limit("10 per 12 hours")
+@conditional_get(gap_csv_validator)
+def get_gap_query():
+    """Gap dates matching multi-value filters (see gap_query.py), answered from the gap table's bitmaps"""
+    # Check action limits for button clicks
+    if is_sample_mode():
+        sample_action = request.args.get('sample_action')
+        if sample_action == 'find_gap_dates':
+            if not check_sample_action_limit():
+                logging.info(f"Sample mode action limit exceeded for session: {session.get('user_id')}")
+                return jsonify({
+                    'error': 'Sample limit reached: You\'ve used your 3 free action buttons. Sign up FREE for unlimited access!',
+                    'limit_reached': True
+                }), 429
+    else:
+        main_action = request.args.get('main_action')
+        if main_action == 'find_gap_dates':
+            if not check_main_action_limit():
+                logging.info(f"Main action limit exceeded for user: {session.get('user_id')}")
+                return jsonify({
+                    'error': 'Action limit reached: You\'ve used your 10 free action buttons. Please wait 12 hours or upgrade your plan.',
+                    'limit_reached': True
+                }), 429
+
+    try:
+        ticker = gap_ticker()
+        if ticker not in TICKERS:
+            return jsonify({'error': 'Invalid ticker'}), 400
+        gap_data_file = gap_data_path(ticker)
+        table = get_gap_table(ticker)
+        try:
+            filters = parse_gap_query(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        logging.debug(f"{ticker} gap query filters: {filters}")
+        if not os.path.exists(gap_data_file):
+            logging.error(f"Gap data file not found: {gap_data_file}")
+            return jsonify({'error': 'Gap data file not found. Please contact support.'}), 404
+        try:
+            filtered_df = table.query(filters)
+        except Exception as e:
+            logging.error(f"Error reading gap data file {gap_data_file}: {str(e)}")
+            return jsonify({'error': f'Failed to load gap data: {str(e)}'}), 500
+        if 'date' not in filtered_df.columns:
+            logging.error("Invalid gap data format: missing required columns")
+            return jsonify({'error': 'Invalid gap data format'}), 400
+        dates = filtered_df['date'].tolist()
+        if not dates:
+            return jsonify({'dates': [], 'message': 'No gaps found for the selected criteria'})
+        if is_sample_mode():
+            dates = filter_dates_for_sample(dates)
+            logging.debug(f"Filtered to {len(dates)} gap dates for sample mode")
+        logging.debug(f"Gap query matched {len(dates)} gap dates")
+        return jsonify({'dates': sorted(dates)})
+    except Exception as e:
+        logging.error(f"Error processing gap query: {str(e)}")
+        return jsonify({'error': 'Server error'}), 500
+
+BACKTEST_MATRIX_CACHE_TICKERS = int(os.environ.get('BACKTEST_MATRIX_CACHE_TICKERS', 4))
+
+@functools.lru_cache(maxsize=BACKTEST_MATRIX_CACHE_TICKERS)
+def cached_candle_matrix(ticker, version):
+    """Regular-session minute matrices of every stored day, shared by backtests until the shards change"""
+    dates = date_catalog.dates(ticker) or ['1970-01-01']
+    return candle_matrix(load_range_candles(ticker, dates[0], dates[-1]), REGULAR_SESSION_START_SECONDS)
+
+@app.route('/api/gaps/backtest', methods=['GET'])
+@limiter.limit("20 per hour")
+def get_gap_backtest():
+    """Backtest entry/target/stop rules (see gap_backtest.py) over the gap days matching the gap query filters"""
+    # Check action limits for button clicks
+    if is_sample_mode():
+        sample_action = request.args.get('sample_action')
+        if sample_action == 'run_backtest':
+            if not check_sample_action_limit():
+                logging.info(f"Sample mode action limit exceeded for session: {session.get('user_id')}")
+                return jsonify({
+                    'error': 'Sample limit reached: You\'ve used your 3 free action buttons. Sign up FREE for unlimited access!',
+                    'limit_reached': True
+                }), 429
+    else:
+        main_action = request.args.get('main_action')
+        if main_action == 'run_backtest':
+            if not check_main_action_limit():
+                logging.info(f"Main action limit exceeded for user: {session.get('user_id')}")
+                return jsonify({
+                    'error': 'Action limit reached: You\'ve used your 10 free action buttons. Please wait 12 hours or upgrade your plan.',
+                    'limit_reached': True
+                }), 429
+
+    try:
+        ticker = gap_ticker()
+        if ticker not in TICKERS:
+            return jsonify({'error': 'Invalid ticker'}), 400
+        gap_data_file = gap_data_path(ticker)
+        table = get_gap_table(ticker)
+        try:
+            filters = parse_gap_query(request.args)
+            rules = parse_backtest_rules(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        logging.debug(f"{ticker} gap backtest: filters={filters}, rules={rules}")
+        if not os.path.exists(gap_data_file):
+            logging.error(f"Gap data file not found: {gap_data_file}")
+            return jsonify({'error': 'Gap data file not found. Please contact support.'}), 404
+        try:
+            gaps = table.query(filters)
+        except Exception as e:
+            logging.error(f"Error reading gap data file {gap_data_file}: {str(e)}")
+            return jsonify({'error': f'Failed to load gap data: {str(e)}'}), 500
+        if not all(col in gaps.columns for col in ['date', 'gap_direction', 'prev_close']):
+            logging.error("Invalid gap data format: missing required columns")
+            return jsonify({'error': 'Invalid gap data format'}), 400
+        if is_sample_mode():
+            gaps = gaps[gaps['date'].isin(filter_dates_for_sample(gaps['date'].tolist()))]
+
+        start_time = time.perf_counter()
+        dates, matrices = cached_candle_matrix(ticker, data_version(ticker))
+        summary, equity_curve, days_without_candles = backtest_gap_days(dates, matrices, gaps, rules)
+        logging.debug(f"Backtested {summary['trades']} {ticker} gap days in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+        return jsonify({
+            'ticker': ticker,
+            'rules': rules,
+            'matched_days': len(gaps),
+            'days_without_candles': days_without_candles,
+            'summary': summary,
+            'equity_curve': equity_curve
+        })
+    except Exception as e:
+        logging.error(f"Error running gap backtest: {str(e)}")
+        return jsonify({'error': 'Server error'}), 500
+
 @app.route('/api/gap_insights', methods=['GET'])
 @limiter.limit("3 per 12 hours")
 def get_gap_insights():
@@ -964,13 +1490,18 @@ def get_gap_insights():
                 }), 429
     
     try:
+        ticker = gap_ticker()
+        if ticker not in TICKERS:
+            return jsonify({'error': 'Invalid ticker'}), 400
+        gap_data_file = gap_data_path(ticker)
+        table = get_gap_table(ticker)
         gap_size = request.args.get('gap_size')
         day = request.args.get('day')
         gap_direction = request.args.get('gap_direction')
-        logging.debug(f"Fetching gap insights for gap_size={gap_size}, day={day}, gap_direction={gap_direction}")
+        logging.debug(f"Fetching {ticker} gap insights for gap_size={gap_size}, day={day}, gap_direction={gap_direction}")
         
-        # Get current QQQ market data for price calculations
-        qqq_data = scrape_qqq_data()
+        # Get current QQQ market data for price calculations (the live overlay only exists for QQQ)
+        qqq_data = scrape_qqq_data() if ticker == 'QQQ' else None
         current_open_price = None
         current_prev_close = None
         
@@ -981,65 +1512,36 @@ def get_gap_insights():
                 logging.debug(f"Current QQQ Open: ${current_open_price}, Prev Close: ${current_prev_close}")
             except (ValueError, TypeError) as e:
                 logging.warning(f"Could not parse QQQ prices: {e}")
-        if not os.path.exists(GAP_DATA_PATH):
-            logging.error(f"Gap data file not found: {GAP_DATA_PATH}")
+        if not os.path.exists(gap_data_file):
+            logging.error(f"Gap data file not found: {gap_data_file}")
             return jsonify({'error': 'Gap data file not found. Please contact support.'}), 404
         try:
-            df = pd.read_csv(GAP_DATA_PATH)
+            df = table.frame()
             logging.debug(f"Loaded gap data with shape: {df.shape}")
         except Exception as e:
-            logging.error(f"Error reading gap data file {GAP_DATA_PATH}: {str(e)}")
+            logging.error(f"Error reading gap data file {gap_data_file}: {str(e)}")
             return jsonify({'error': f'Failed to load gap data: {str(e)}'}), 500
-        required_columns = [
-            'gap_size_bin', 'day_of_week', 'gap_direction', 'filled',
-            'move_before_reversal_fill_direction_pct', 'max_move_gap_direction_first_30min_pct',
-            'time_of_low', 'time_of_high', 'reversal_after_fill', 'time_to_fill_minutes'
-        ]
-        if not all(col in df.columns for col in required_columns):
+        if not all(col in df.columns for col in GAP_INSIGHT_COLUMNS):
             logging.error("Invalid gap data format: missing required columns")
             return jsonify({'error': 'Invalid gap data format'}), 400
-        filtered_df = df[
-            (df['gap_size_bin'] == gap_size) &
-            (df['day_of_week'] == day) &
-            (df['gap_direction'] == gap_direction)
-        ].copy()
-        logging.debug(f"Filtered DataFrame shape: {filtered_df.shape}")
-        if filtered_df.empty:
+        # Single-key filters come precomputed from the insight cube; only the live-price overlay is done here
+        if is_gap_query(request.args):
+            try:
+                filters = parse_gap_query(request.args)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            stats = insight_stats(table.query(filters))
+        else:
+            stats = table.insights(gap_size, day, gap_direction)
+        if stats is None:
             logging.debug(f"No data found for gap_size={gap_size}, day={day}, gap_direction={gap_direction}")
             return jsonify({'insights': {}, 'message': 'No data found for the selected criteria'})
-        
-        # Log some sample data to debug
-        logging.debug(f"Sample time_of_low values: {filtered_df['time_of_low'].head().tolist()}")
-        logging.debug(f"Sample time_of_high values: {filtered_df['time_of_high'].head().tolist()}")
-        
-        gap_fill_rate = filtered_df['filled'].mean() * 100
-        filled_df = filtered_df[filtered_df['filled'] == True]
-        unfilled_df = filtered_df[filtered_df['filled'] == False]
-        reversal_after_fill_rate = filtered_df['reversal_after_fill'].mean() * 100 if not filtered_df.empty else 0
-        median_time_to_fill = filled_df['time_to_fill_minutes'].median() if not filled_df.empty else 0
-        average_time_to_fill = filled_df['time_to_fill_minutes'].mean() if not filled_df.empty else 0
+        logging.debug(f"Gap insight cube entry covers {stats['count']} gaps")
 
-        def time_to_minutes(t):
-            try:
-                if pd.isna(t) or t is None or str(t).strip() == '':
-                    return pd.NaT
-                parts = str(t).split(':')
-                if len(parts) < 2:
-                    return pd.NaT
-                h, m = map(int, parts[:2])
-                return h * 60 + m
-            except:
-                return pd.NaT
-
-        # Safely apply time conversion with error handling
-        try:
-            filtered_df.loc[:, 'time_of_low_minutes'] = filtered_df['time_of_low'].apply(time_to_minutes)
-            filtered_df.loc[:, 'time_of_high_minutes'] = filtered_df['time_of_high'].apply(time_to_minutes)
-        except Exception as e:
-            logging.warning(f"Error converting time columns: {e}")
-            # Set default values if conversion fails
-            filtered_df.loc[:, 'time_of_low_minutes'] = pd.NaT
-            filtered_df.loc[:, 'time_of_high_minutes'] = pd.NaT
+        gap_fill_rate = stats['gap_fill_rate'] * 100
+        reversal_after_fill_rate = stats['reversal_after_fill_rate'] * 100
+        median_time_to_fill = stats['median_time_to_fill']
+        average_time_to_fill = stats['average_time_to_fill']
 
         def minutes_to_time(minutes):
             if pd.isna(minutes):
@@ -1048,10 +1550,10 @@ def get_gap_insights():
             mins = int(minutes % 60)
             return f"{hours:02d}:{mins:02d}"
 
-        median_low_minutes = filtered_df['time_of_low_minutes'].median()
-        average_low_minutes = filtered_df['time_of_low_minutes'].mean()
-        median_high_minutes = filtered_df['time_of_high_minutes'].median()
-        average_high_minutes = filtered_df['time_of_high_minutes'].mean()
+        median_low_minutes = stats['median_low_minutes']
+        average_low_minutes = stats['average_low_minutes']
+        median_high_minutes = stats['median_high_minutes']
+        average_high_minutes = stats['average_high_minutes']
 
         # Calculate price-based metrics
         def calculate_price_levels(percentage, base_price, direction='up'):
@@ -1065,12 +1567,12 @@ def get_gap_insights():
                 return base_price - (percentage / 100 * base_price)
 
         # Get the key metrics for price calculations
-        median_move_before_fill_pct = filled_df['move_before_reversal_fill_direction_pct'].median() if not filled_df.empty else 0
-        average_move_before_fill_pct = filled_df['move_before_reversal_fill_direction_pct'].mean() if not filled_df.empty else 0
-        median_max_move_unfilled_pct = unfilled_df['max_move_gap_direction_first_30min_pct'].median() if not unfilled_df.empty else 0
-        average_max_move_unfilled_pct = unfilled_df['max_move_gap_direction_first_30min_pct'].mean() if not unfilled_df.empty else 0
-        median_move_before_reversal_pct = filtered_df['move_before_reversal_fill_direction_pct'].median() if not filtered_df.empty else 0
-        average_move_before_reversal_pct = filtered_df['move_before_reversal_fill_direction_pct'].mean() if not filtered_df.empty else 0
+        median_move_before_fill_pct = stats['median_move_before_fill_pct']
+        average_move_before_fill_pct = stats['average_move_before_fill_pct']
+        median_max_move_unfilled_pct = stats['median_max_move_unfilled_pct']
+        average_max_move_unfilled_pct = stats['average_max_move_unfilled_pct']
+        median_move_before_reversal_pct = stats['median_move_before_reversal_pct']
+        average_move_before_reversal_pct = stats['average_move_before_reversal_pct']
 
         # Calculate price levels from Open Price
         median_move_before_fill_price = calculate_price_levels(median_move_before_fill_pct, current_open_price, gap_direction) if current_open_price else None
@@ -1188,6 +1690,11 @@ def get_gap_insights():
                 'today_day': today_day
             }
         }
+        # Bootstrap intervals come precomputed with the cube entry (or with the query's row set)
+        for name, interval in stats['confidence_intervals'].items():
+            insights[name]['confidence_interval'] = interval
+        if request.args.get('distributions', '').lower() in ('1', 'true'):
+            insights['distributions'] = stats['distributions']
         logging.debug(f"Computed insights: {insights}")
         return jsonify({'insights': insights})
     except Exception as e:
@@ -1203,15 +1710,14 @@ def get_previous_high_low_insights():
         day_of_week = request.args.get('day_of_week')
         logging.debug(f"Fetching previous high/low insights for open_position={open_position}, day_of_week={day_of_week}")
         
-        # Path to the previous high/low data file
-        previous_high_low_path = os.path.join(DATA_DIR, "previuos_high_low.csv")
+        previous_high_low_path = PREVIOUS_HIGH_LOW_PATH
         
         if not os.path.exists(previous_high_low_path):
             logging.error(f"Previous high/low data file not found: {previous_high_low_path}")
             return jsonify({'error': 'Previous high/low data file not found. Please contact support.'}), 404
         
         try:
-            df = pd.read_csv(previous_high_low_path)
+            df = previous_high_low_table.frame()
             logging.debug(f"Loaded previous high/low data with shape: {df.shape}")
         except Exception as e:
             logging.error(f"Error reading previous high/low data file {previous_high_low_path}: {str(e)}")
@@ -1227,8 +1733,8 @@ def get_previous_high_low_insights():
             logging.error("Invalid previous high/low data format: missing required columns")
             return jsonify({'error': 'Invalid previous high/low data format'}), 400
         
-        # Filter data based on parameters
-        filtered_df = df.copy()
+        # Filter data based on parameters (the cached frame is shared, so filtering never copies it)
+        filtered_df = df
         
         if open_position:
             filtered_df = filtered_df[filtered_df['open_position'] == open_position]
@@ -1385,6 +1891,7 @@ def get_years():
 
 @app.route('/api/events', methods=['GET'])
 @limiter.limit("10 per 12 hours")
+@conditional_get(csv_validator(EVENTS_DATA_PATH))
 def get_events():
     # Check action limits for button clicks
     if is_sample_mode():
@@ -1460,6 +1967,7 @@ def get_events():
 
 @app.route('/api/economic_events', methods=['GET'])
 @limiter.limit("10 per 12 hours")
+@conditional_get(csv_validator(ECONOMIC_DATA_BINNED_PATH))
 def get_economic_events():
     try:
         event_type = request.args.get('event_type')
@@ -1496,6 +2004,7 @@ def get_economic_events():
 
 @app.route('/api/earnings', methods=['GET'])
 @limiter.limit("10 per 12 hours")
+@conditional_get(csv_validator(EARNINGS_DATA_PATH))
 def get_earnings():
     # Check action limits for button clicks
     if not is_sample_mode():
@@ -1926,6 +2435,15 @@ def scrape_qqq_data():
         logging.error(f"Error scraping QQQ data: {str(e)}")
         return None
 
+@app.route('/api/stats', methods=['GET'])
+@limiter.limit("60 per hour")
+def get_stats():
+    """Internal counters for the candle data path (signed-in users only)"""
+    if not session.get('authenticated'):
+        logging.info(f"Unauthenticated stats request from session: {session.get('user_id')}")
+        return jsonify({'error': 'Login required'}), 401
+    return jsonify({'db_pool': candle_pool.stats(), 'chart_cache': chart_cache.stats()})
+
 @app.route('/api/qqq_data', methods=['GET'])
 @limiter.limit("10 per hour")
 def get_qqq_data():
@@ -0,0 +1,59 @@
+"""Compare day-load latency of the SQLite and columnar candle backends.
+
+Run from the repository root after building the columnar store:
+
+    python candle_store.py build QQQ
+    python benchmarks/bench_chart_backends.py --ticker QQQ --samples 200
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_db import load_day_candles_sqlite
+from candle_store import COLUMNAR_DIR, CandleStore
+
+def time_calls(fn, dates):
+    timings = []
+    for date in dates:
+        start = time.perf_counter()
+        fn(date)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+def report(name, timings):
+    p50, p99 = np.percentile(timings, [50, 99])
+    print(f"{name:<10} p50={p50:8.3f} ms  p99={p99:8.3f} ms  mean={timings.mean():8.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ticker', default='QQQ')
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--root', default=COLUMNAR_DIR)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    store = CandleStore(args.root)
+    stored = store.stored_dates(args.ticker)
+    if stored is None:
+        print(f"No columnar store for {args.ticker} in {args.root}; run candle_store.py build first")
+        return 1
+    all_dates = np.datetime_as_string(stored).tolist()
+    random.seed(args.seed)
+    dates = [random.choice(all_dates) for _ in range(args.samples)]
+
+    # Warm both paths once so the comparison is steady-state
+    load_day_candles_sqlite(args.ticker, dates[0])
+    store.load_day(args.ticker, dates[0])
+
+    print(f"{args.ticker}: {args.samples} random days out of {len(all_dates)}")
+    report('sqlite', time_calls(lambda d: load_day_candles_sqlite(args.ticker, d), dates))
+    report('columnar', time_calls(lambda d: store.load_day(args.ticker, d), dates))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
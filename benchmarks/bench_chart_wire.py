@@ -0,0 +1,46 @@
+"""Payload size and server encode time: JSON chart_data vs the compact binary format.
+
+    python benchmarks/bench_chart_wire.py --repeat 200
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from chart_wire import chart_data_dict, encode_chart_compact
+from resample import resample_frame
+from bench_resample import synthetic_day
+
+def median_us(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return np.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    day = synthetic_day()
+    print(f"{'payload':<14} {'format':<8} {'bytes':>8} {'gzip':>8} {'encode us':>10}")
+    for label, df in (('1-minute', day), ('5-minute', resample_frame(day, 5))):
+        encoders = {
+            'json': lambda: json.dumps({'chart_data': chart_data_dict(df, 'QQQ', '2024-03-15')}).encode('utf-8'),
+            'compact': lambda: encode_chart_compact(df, 'QQQ', '2024-03-15')
+        }
+        for name, encode in encoders.items():
+            body = encode()
+            print(f"{label + f' ({len(df)})':<14} {name:<8} {len(body):>8} {len(gzip.compress(body)):>8} {median_us(encode, args.repeat):>10.1f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
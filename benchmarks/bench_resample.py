@@ -0,0 +1,64 @@
+"""Microbenchmark: pandas resample().agg() vs the NumPy reduceat resampler.
+
+Checks that both produce identical bars for every chart timeframe, then
+times them on one synthetic extended-hours day (04:00-20:00, with gaps).
+
+    python benchmarks/bench_resample.py --repeat 200
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_db import CHART_TIMEFRAMES
+from resample import resample_frame, resample_frame_pandas as pandas_resample
+
+def synthetic_day(seed=0, date='2024-03-15'):
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range(f'{date} 04:00', f'{date} 19:59', freq='1min')
+    timestamps = timestamps[rng.random(len(timestamps)) > 0.05]
+    close = 400 * np.exp(np.cumsum(rng.normal(0, 0.0008, len(timestamps))))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.0004, len(timestamps))) * close
+    return pd.DataFrame({
+        'timestamp': timestamps,
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.integers(100, 50000, len(timestamps))
+    })
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return np.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    df = synthetic_day()
+    print(f"{len(df)} one-minute candles")
+    print(f"{'timeframe':>9} {'bars':>6} {'pandas us':>10} {'numpy us':>10} {'speedup':>8}")
+    for timeframe in CHART_TIMEFRAMES:
+        if timeframe == 1:
+            continue
+        expected = pandas_resample(df, timeframe)
+        actual = resample_frame(df, timeframe)
+        pd.testing.assert_frame_equal(expected, actual, check_dtype=False)
+        pandas_us = best_of(lambda: pandas_resample(df, timeframe), args.repeat)
+        numpy_us = best_of(lambda: resample_frame(df, timeframe), args.repeat)
+        print(f"{timeframe:>9} {len(actual):>6} {pandas_us:>10.1f} {numpy_us:>10.1f} {pandas_us / numpy_us:>7.1f}x")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
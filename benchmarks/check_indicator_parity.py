@@ -0,0 +1,103 @@
+"""Parity check: indicators.py against the calculate* functions in static/script.js.
+
+Computes every server indicator on synthetic 1/5/15-minute days, then runs
+the JavaScript calculators on the same bars under node and compares them
+bar for bar: warm-up positions must match exactly (NaN on the server, no
+point in JS) and values to a relative error of --tolerance. Exits 1 on any
+mismatch. Requires node on PATH.
+
+    python benchmarks/check_indicator_parity.py
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from indicators import compute_indicators
+from resample import resample_frame
+from bench_resample import synthetic_day
+
+SCRIPT_JS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'script.js')
+
+INDICATORS = ['sma_20', 'ema_9', 'ema_50', 'vwap', 'rsi', 'macd', 'bollinger', 'stochastic']
+
+# Runs the script.js calculators on the bars in argv[3] and prints {series name: [value or null]}
+NODE_HARNESS = r"""
+const fs = require('fs');
+const src = fs.readFileSync(process.argv[2], 'utf8');
+eval(src.slice(src.indexOf('// Technical Indicator Calculation Functions'), src.indexOf('// Add Indicator to Chart')));
+const d = JSON.parse(fs.readFileSync(process.argv[3], 'utf8'));
+const candles = d.close.map((_, i) => ({ time: i, open: d.open[i], high: d.high[i], low: d.low[i], close: d.close[i] }));
+const volume = d.volume.map((v, i) => ({ time: i, value: v }));
+const aligned = points => {
+    const out = new Array(candles.length).fill(null);
+    points.forEach(p => { out[p.time] = p.value; });
+    return out;
+};
+const macd = calculateMACD(candles, 12, 26, 9);
+const bands = calculateBollingerBands(candles, 20, 2);
+const stochastic = calculateStochastic(candles, 14, 3);
+console.log(JSON.stringify({
+    sma_20: aligned(calculateSMA(candles, 20)),
+    ema_9: aligned(calculateEMA(candles, 9)),
+    ema_50: aligned(calculateEMA(candles, 50)),
+    vwap: aligned(calculateVWAP(candles, volume)),
+    rsi: aligned(calculateRSI(candles, 14)),
+    macd: aligned(macd.macdLine),
+    macd_signal: aligned(macd.signalLine),
+    macd_histogram: aligned(macd.histogram),
+    bollinger_upper: aligned(bands.upper),
+    bollinger_middle: aligned(bands.middle),
+    bollinger_lower: aligned(bands.lower),
+    stochastic_k: aligned(stochastic.stochK),
+    stochastic_d: aligned(stochastic.stochD)
+}));
+"""
+
+def js_series(node, df):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        harness = os.path.join(tmp_dir, 'harness.js')
+        bars = os.path.join(tmp_dir, 'bars.json')
+        with open(harness, 'w', encoding='utf-8') as f:
+            f.write(NODE_HARNESS)
+        with open(bars, 'w', encoding='utf-8') as f:
+            json.dump({name: df[name].tolist() for name in ('open', 'high', 'low', 'close', 'volume')}, f)
+        output = subprocess.run([node, harness, SCRIPT_JS, bars], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tolerance', type=float, default=1e-9)
+    args = parser.parse_args()
+
+    node = shutil.which('node')
+    if node is None:
+        print("node not found on PATH; the JavaScript side cannot be run")
+        return 2
+    day = synthetic_day()
+    failures = 0
+    print(f"{'timeframe':<10} {'series':<18} {'bars':>6} {'max rel err':>12}")
+    for timeframe in (1, 5, 15):
+        df = resample_frame(day, timeframe) if timeframe > 1 else day
+        server = compute_indicators(df, INDICATORS)
+        client = js_series(node, df)
+        for name, values in server.items():
+            expected = np.array([np.nan if value is None else value for value in client[name]], dtype=np.float64)
+            warmup_matches = np.array_equal(np.isnan(values), np.isnan(expected))
+            known = ~np.isnan(values) & ~np.isnan(expected)
+            error = np.max(np.abs(values[known] - expected[known]) / np.maximum(1, np.abs(expected[known])), initial=0)
+            ok = warmup_matches and error <= args.tolerance
+            failures += not ok
+            print(f"{timeframe:<10} {name:<18} {len(values):>6} {error:>12.2e}{'' if ok else '  MISMATCH'}")
+    print('parity ok' if not failures else f'{failures} series differ')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
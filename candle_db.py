@@ -0,0 +1,278 @@
+import os
+import re
+import logging
+import shutil
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.request import pathname2url
+import numpy as np
+import pandas as pd
+
+from resample import resample_frame
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+DB_DIR = os.path.join(DATA_DIR, "db")
+
+TICKERS = ['QQQ', 'AAPL', 'MSFT', 'TSLA', 'ORCL', 'NVDA', 'MSTR', 'UBER', 'PLTR', 'META']
+
+# QQQ is split into stock_data_qqq_part<N>.db files; ingest.py starts a new part when the last one is full
+QQQ_PART_PATTERN = re.compile(r'^stock_data_qqq_part(\d+)\.db$')
+
+def qqq_part_path(part, db_dir=DB_DIR):
+    return os.path.join(db_dir, f"stock_data_qqq_part{part}.db")
+
+def qqq_db_paths(db_dir=DB_DIR):
+    """Existing QQQ part files in part-number order"""
+    try:
+        names = os.listdir(db_dir)
+    except OSError:
+        return []
+    parts = sorted(int(match.group(1)) for match in map(QQQ_PART_PATTERN.match, names) if match)
+    return [qqq_part_path(part, db_dir) for part in parts]
+
+# Pooled connections use immutable=1, so shards and rollup files are only ever written through
+# writable_copy: changes go to a private copy that replaces the live file once they succeed
+@contextmanager
+def writable_copy(db_path):
+    """Connection to a private copy of a database file (empty for a new one), swapped into place when the block succeeds"""
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(db_path)}.", suffix='.tmp', dir=os.path.dirname(db_path))
+    os.close(fd)
+    try:
+        if os.path.exists(db_path):
+            shutil.copy2(db_path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+        conn = sqlite3.connect(tmp_path, isolation_level=None)
+        try:
+            # Nobody else sees the copy, so the journal only needs to support ROLLBACK
+            conn.execute("PRAGMA journal_mode = MEMORY")
+            conn.execute("PRAGMA synchronous = OFF")
+            yield conn
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+        finally:
+            conn.close()
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, db_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# Pragmas applied to every pooled read-only shard connection
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_CACHE_KIB = int(os.environ.get('SQLITE_CACHE_KIB', 32 * 1024))
+POOL_MAX_IDLE_PER_SHARD = int(os.environ.get('POOL_MAX_IDLE_PER_SHARD', 8))
+SHARD_QUERY_THREADS = int(os.environ.get('SHARD_QUERY_THREADS', 4))
+
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+CHART_TIMEFRAMES = [1, 2, 3, 5, 10, 15, 30, 60, 240]
+
+# Regular market hours used by restrict_hours (inclusive on both ends)
+REGULAR_SESSION_START = '09:30:00'
+REGULAR_SESSION_END = '16:00:00'
+
+CHART_QUERY = """
+    SELECT timestamp, open, high, low, close, volume
+    FROM candles
+    WHERE ticker = ? AND DATE(timestamp) = ?
+    ORDER BY timestamp
+"""
+
+VALID_DATES_QUERY = "SELECT DISTINCT DATE(timestamp) AS date FROM candles WHERE ticker = ?"
+
+TICKERS_QUERY = "SELECT DISTINCT ticker FROM candles"
+
+# Shards upgraded by optimize_db.py carry a stored trade_date column, a
+# covering (ticker, trade_date, timestamp, OHLCV) index and a tickers table.
+CHART_QUERY_BY_TRADE_DATE = """
+    SELECT timestamp, open, high, low, close, volume
+    FROM candles
+    WHERE ticker = ? AND trade_date = ?
+    ORDER BY timestamp
+"""
+
+VALID_DATES_QUERY_BY_TRADE_DATE = "SELECT DISTINCT trade_date AS date FROM candles WHERE ticker = ?"
+
+TICKERS_TABLE_QUERY = "SELECT ticker FROM tickers"
+
+def get_db_paths(ticker):
+    if ticker not in TICKERS:
+        logging.error(f"Invalid ticker requested: {ticker}")
+        return []
+    if ticker == 'QQQ':
+        return qqq_db_paths()
+    db_path = os.path.join(DB_DIR, f"stock_data_{ticker.lower()}.db")
+    return [db_path] if os.path.exists(db_path) else []
+
+def open_readonly(db_path):
+    """Open a tuned, read-only connection to a candle shard"""
+    uri = f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_KIB}")
+    conn.execute("PRAGMA query_only = 1")
+    return conn
+
+class ConnectionPool:
+    """Process-wide pool of read-only shard connections keyed by file path.
+
+    A connection is checked out by one thread at a time, so the pool is safe
+    for gunicorn thread workers. Shards are opened with immutable=1, which
+    means SQLite will not notice a replaced file by itself; connections are
+    therefore recycled whenever the file's mtime changes.
+    """
+
+    def __init__(self, max_idle_per_shard=POOL_MAX_IDLE_PER_SHARD):
+        self.max_idle_per_shard = max_idle_per_shard
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._counters = {'hits': 0, 'misses': 0, 'recycled': 0}
+
+    @contextmanager
+    def connection(self, db_path):
+        mtime = os.path.getmtime(db_path)
+        conn = None
+        with self._lock:
+            idle = self._idle.setdefault(db_path, [])
+            while idle and conn is None:
+                candidate, candidate_mtime = idle.pop()
+                if candidate_mtime == mtime:
+                    conn = candidate
+                else:
+                    candidate.close()
+                    self._counters['recycled'] += 1
+            self._counters['hits' if conn is not None else 'misses'] += 1
+        if conn is None:
+            conn = open_readonly(db_path)
+            logging.debug(f"Opened pooled connection to {db_path}")
+        try:
+            yield conn
+        except Exception:
+            conn.close()
+            raise
+        with self._lock:
+            idle = self._idle.setdefault(db_path, [])
+            if len(idle) < self.max_idle_per_shard:
+                idle.append((conn, mtime))
+                conn = None
+        if conn is not None:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['idle'] = {os.path.basename(path): len(idle) for path, idle in self._idle.items()}
+        return stats
+
+    def clear(self):
+        with self._lock:
+            idle_lists = list(self._idle.values())
+            self._idle = {}
+        for idle in idle_lists:
+            for conn, _ in idle:
+                conn.close()
+
+    def _reset_after_fork(self):
+        # SQLite handles must not cross a fork; drop them without closing
+        self._lock = threading.Lock()
+        self._idle = {}
+
+candle_pool = ConnectionPool()
+os.register_at_fork(after_in_child=candle_pool._reset_after_fork)
+
+# db_path -> (mtime, features): one entry per shard file, replaced when the file changes
+_shard_features = {}
+_shard_features_lock = threading.Lock()
+
+def shard_features(conn, db_path):
+    """Return which optimize_db.py upgrades a shard has, cached per file version"""
+    mtime = os.path.getmtime(db_path)
+    cached = _shard_features.get(db_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(candles)")}
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    features = {'trade_date': 'trade_date' in columns, 'tickers_table': 'tickers' in tables}
+    with _shard_features_lock:
+        _shard_features[db_path] = (mtime, features)
+    return features
+
+def chart_query(conn, db_path):
+    return CHART_QUERY_BY_TRADE_DATE if shard_features(conn, db_path)['trade_date'] else CHART_QUERY
+
+def valid_dates_query(conn, db_path):
+    return VALID_DATES_QUERY_BY_TRADE_DATE if shard_features(conn, db_path)['trade_date'] else VALID_DATES_QUERY
+
+def tickers_query(conn, db_path):
+    return TICKERS_TABLE_QUERY if shard_features(conn, db_path)['tickers_table'] else TICKERS_QUERY
+
+_shard_executor = None
+_shard_executor_lock = threading.Lock()
+
+def map_shards(db_paths, fn):
+    """Call fn(conn, db_path) on a pooled connection for each shard, in parallel only when there are several"""
+    global _shard_executor
+    if len(db_paths) <= 1:
+        results = []
+        for db_path in db_paths:
+            with candle_pool.connection(db_path) as conn:
+                results.append(fn(conn, db_path))
+        return results
+    with _shard_executor_lock:
+        if _shard_executor is None:
+            _shard_executor = ThreadPoolExecutor(max_workers=SHARD_QUERY_THREADS, thread_name_prefix='shard-query')
+
+    def run(db_path):
+        with candle_pool.connection(db_path) as conn:
+            return fn(conn, db_path)
+
+    return list(_shard_executor.map(run, db_paths))
+
+def load_day_candles_sqlite(ticker, target_date, db_paths=None):
+    """Read one day of 1-minute candles for a ticker from its SQLite shards"""
+    if db_paths is None:
+        db_paths = get_db_paths(ticker)
+    if not db_paths:
+        return pd.DataFrame({column: pd.Series(dtype='datetime64[ns]' if column == 'timestamp' else 'float64') for column in CANDLE_COLUMNS})
+    df_list = map_shards(db_paths, lambda conn, db_path: pd.read_sql_query(
+        chart_query(conn, db_path), conn, params=(ticker, str(target_date)), parse_dates=['timestamp']))
+    df = pd.concat(df_list, ignore_index=True)
+    return df.sort_values('timestamp')
+
+def _seconds_of_day(clock):
+    hours, minutes, seconds = (int(part) for part in clock.split(':'))
+    return hours * 3600 + minutes * 60 + seconds
+
+REGULAR_SESSION_START_SECONDS = _seconds_of_day(REGULAR_SESSION_START)
+REGULAR_SESSION_END_SECONDS = _seconds_of_day(REGULAR_SESSION_END)
+
+def regular_session_bounds(timestamps):
+    """Index range [lo, hi) of the regular session in epoch-second timestamps of one sorted day, or None otherwise"""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if len(timestamps) == 0:
+        return 0, 0
+    day_start = timestamps[0] - timestamps[0] % 86400
+    if timestamps[-1] - day_start >= 86400 or np.any(timestamps[1:] < timestamps[:-1]):
+        return None
+    lo = np.searchsorted(timestamps, day_start + REGULAR_SESSION_START_SECONDS, side='left')
+    hi = np.searchsorted(timestamps, day_start + REGULAR_SESSION_END_SECONDS, side='right')
+    return int(lo), int(hi)
+
+def filter_regular_hours(df):
+    """Keep only candles between 9:30 AM and 4:00 PM (a contiguous slice of a sorted day)"""
+    timestamps = df['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64) // 1_000_000_000
+    bounds = regular_session_bounds(timestamps)
+    if bounds is not None:
+        return df.iloc[bounds[0]:bounds[1]]
+    # Several days in one frame: integer seconds-of-day mask instead of a slice
+    seconds = timestamps % 86400
+    return df[(seconds >= REGULAR_SESSION_START_SECONDS) & (seconds <= REGULAR_SESSION_END_SECONDS)]
+
+def resample_candles(df, timeframe):
+    """Aggregate 1-minute candles into timeframe-minute bars"""
+    return resample_frame(df, timeframe)
@@ -0,0 +1,215 @@
+"""Columnar, memory-mapped candle store.
+
+Each ticker gets a directory of .npy column files (epoch-second timestamps,
+float OHLC, integer volume) plus a day index, so one trading day is a
+zero-copy slice of the mapped arrays.
+
+Build or rebuild the store from the SQLite shards with:
+
+    python candle_store.py build [TICKER ...]
+"""
+import os
+import sys
+import shutil
+import logging
+import argparse
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+from candle_db import DATA_DIR, TICKERS, get_db_paths
+
+COLUMNAR_DIR = os.path.join(DATA_DIR, "columnar")
+
+# Candle storage backend for chart requests: 'sqlite' (default) or 'columnar'
+CANDLE_BACKEND = os.environ.get('CANDLE_BACKEND', 'sqlite').lower()
+
+COLUMNS = {
+    'timestamp': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.int64
+}
+
+SECONDS_PER_DAY = 86400
+
+def date_to_day_number(target_date):
+    """Convert a date (or YYYY-MM-DD string) to days since the Unix epoch"""
+    return int(np.datetime64(str(target_date), 'D').astype(np.int64))
+
+def _shard_start(db_path, ticker):
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT MIN(timestamp), COUNT(*) FROM candles WHERE ticker = ?", (ticker,)).fetchone()
+    finally:
+        conn.close()
+    return row[0], row[1]
+
+def build_ticker(ticker, db_paths=None, root=COLUMNAR_DIR, chunksize=500000):
+    """Write the columnar files for one ticker from its SQLite shards"""
+    if db_paths is None:
+        db_paths = get_db_paths(ticker)
+    if not db_paths:
+        logging.warning(f"No database files found for {ticker}, skipping columnar build")
+        return 0
+
+    # Shards hold disjoint date ranges, so ordering them by their first
+    # timestamp keeps the concatenated columns sorted.
+    shards = []
+    for db_path in db_paths:
+        start, count = _shard_start(db_path, ticker)
+        if count:
+            shards.append((start, count, db_path))
+    shards.sort()
+    total = sum(count for _, count, _ in shards)
+    if not total:
+        logging.warning(f"No candles found for {ticker}, skipping columnar build")
+        return 0
+
+    ticker_dir = os.path.join(root, ticker)
+    tmp_dir = ticker_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = {
+        name: np.lib.format.open_memmap(os.path.join(tmp_dir, f'{name}.npy'), mode='w+', dtype=dtype, shape=(total,))
+        for name, dtype in COLUMNS.items()
+    }
+    query = """
+        SELECT timestamp, open, high, low, close, volume
+        FROM candles
+        WHERE ticker = ?
+        ORDER BY timestamp
+    """
+    offset = 0
+    for _, _, db_path in shards:
+        conn = sqlite3.connect(db_path)
+        try:
+            for chunk in pd.read_sql_query(query, conn, params=(ticker,), chunksize=chunksize):
+                end = offset + len(chunk)
+                timestamps = pd.to_datetime(chunk['timestamp']).values.astype('datetime64[s]')
+                columns['timestamp'][offset:end] = timestamps.astype(np.int64)
+                for name in ('open', 'high', 'low', 'close'):
+                    columns[name][offset:end] = chunk[name].to_numpy(dtype=np.float64)
+                columns['volume'][offset:end] = chunk['volume'].fillna(0).to_numpy().astype(np.int64)
+                offset = end
+        finally:
+            conn.close()
+        logging.debug(f"Copied {db_path} into columnar store for {ticker}")
+
+    timestamps = columns['timestamp']
+    if np.any(np.diff(timestamps) < 0):
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise ValueError(f"Shards for {ticker} overlap, timestamps are not sorted")
+
+    day_numbers = timestamps // SECONDS_PER_DAY
+    boundaries = np.flatnonzero(np.diff(day_numbers)) + 1
+    days = day_numbers[np.concatenate(([0], boundaries))]
+    offsets = np.concatenate(([0], boundaries, [total])).astype(np.int64)
+    for array in columns.values():
+        array.flush()
+    del columns
+
+    np.save(os.path.join(tmp_dir, 'offsets.npy'), offsets)
+    # days.npy is written last; readers use its mtime to detect a rebuild
+    np.save(os.path.join(tmp_dir, 'days.npy'), days.astype(np.int64))
+
+    shutil.rmtree(ticker_dir, ignore_errors=True)
+    os.replace(tmp_dir, ticker_dir)
+    logging.info(f"Built columnar store for {ticker}: {total} candles over {len(days)} days")
+    return total
+
+class CandleStore:
+    """Read-only view over the columnar files, shared across requests"""
+
+    def __init__(self, root=COLUMNAR_DIR):
+        self.root = root
+        self._tickers = {}
+        self._lock = threading.Lock()
+
+    def _open(self, ticker):
+        index_path = os.path.join(self.root, ticker, 'days.npy')
+        try:
+            mtime = os.path.getmtime(index_path)
+        except OSError:
+            return None
+        entry = self._tickers.get(ticker)
+        if entry is not None and entry['mtime'] == mtime:
+            return entry
+        with self._lock:
+            entry = self._tickers.get(ticker)
+            if entry is not None and entry['mtime'] == mtime:
+                return entry
+            ticker_dir = os.path.join(self.root, ticker)
+            entry = {
+                'mtime': mtime,
+                'days': np.load(index_path),
+                'offsets': np.load(os.path.join(ticker_dir, 'offsets.npy')),
+                'columns': {
+                    name: np.load(os.path.join(ticker_dir, f'{name}.npy'), mmap_mode='r')
+                    for name in COLUMNS
+                }
+            }
+            self._tickers[ticker] = entry
+            logging.debug(f"Mapped columnar store for {ticker} ({len(entry['days'])} days)")
+            return entry
+
+    def has_ticker(self, ticker):
+        return self._open(ticker) is not None
+
+    def stored_dates(self, ticker):
+        """Return the stored trading days for a ticker as datetime64[D], or None"""
+        entry = self._open(ticker)
+        if entry is None:
+            return None
+        return entry['days'].astype('datetime64[D]')
+
+    def day_slice(self, ticker, target_date):
+        """Return the columns for one day as views into the mapped files, or None if not stored"""
+        entry = self._open(ticker)
+        if entry is None:
+            return None
+        day = date_to_day_number(target_date)
+        days = entry['days']
+        i = np.searchsorted(days, day)
+        if i >= len(days) or days[i] != day:
+            return None
+        start, end = entry['offsets'][i], entry['offsets'][i + 1]
+        return {name: array[start:end] for name, array in entry['columns'].items()}
+
+    def load_day(self, ticker, target_date):
+        """Return one day as a DataFrame shaped like the SQLite query result, or None"""
+        columns = self.day_slice(ticker, target_date)
+        if columns is None:
+            return None
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(columns['timestamp'], unit='s'),
+            'open': columns['open'],
+            'high': columns['high'],
+            'low': columns['low'],
+            'close': columns['close'],
+            'volume': columns['volume']
+        })
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the columnar candle store from the SQLite shards")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='(Re)build the store for some or all tickers')
+    build_parser.add_argument('tickers', nargs='*', help='Tickers to build (default: all)')
+    build_parser.add_argument('--root', default=COLUMNAR_DIR, help='Output directory')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    tickers = args.tickers or TICKERS
+    for ticker in tickers:
+        if ticker not in TICKERS:
+            logging.error(f"Invalid ticker requested: {ticker}")
+            return 1
+        build_ticker(ticker, root=args.root)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
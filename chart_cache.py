@@ -0,0 +1,97 @@
+"""In-process LRU cache of finished chart payloads.
+
+Historical days never change, so the encoded body get_chart produces for a
+(ticker, date, timeframe, restrict_hours, replay_mode, wire format) request
+can be served again as-is. The cache is bounded by the total size of the
+stored bodies (CHART_CACHE_MAX_BYTES, 0 disables it) and evicts the least
+recently used entries first. Every entry remembers the data version of its
+ticker; when a shard, rollup or columnar index file changes the version
+changes and the stale entry is dropped on its next lookup.
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from candle_db import get_db_paths
+from rollups import rollup_db_path
+from candle_store import COLUMNAR_DIR, CANDLE_BACKEND
+
+CHART_CACHE_MAX_BYTES = int(os.environ.get('CHART_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+def data_version(ticker):
+    """Short fingerprint of the files a ticker's chart data is read from (shards, rollups, columnar store)"""
+    digest = hashlib.sha1(ticker.encode('utf-8'))
+    paths = get_db_paths(ticker) + [rollup_db_path(ticker)]
+    if CANDLE_BACKEND == 'columnar':
+        # A columnar rebuild rewrites days.npy last, which is also what CandleStore reloads on
+        paths.append(os.path.join(COLUMNAR_DIR, ticker, 'days.npy'))
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size};".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+class ChartCache:
+    def __init__(self, max_bytes=CHART_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def _drop(self, key):
+        version, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def get(self, key, version):
+        """Return the cached payload for key if it was stored under the same data version"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != version:
+                self._drop(key)
+                self._invalidations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key, version, payload):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
+            self._entries[key] = (version, payload)
+            self._bytes += size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else None,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations
+            }
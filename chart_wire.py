@@ -0,0 +1,99 @@
+"""Chart payload encoders: the default JSON lists and an opt-in compact binary form.
+
+Compact layout (all little-endian):
+
+    b'OMC1' | uint32 header length | JSON header | column buffers
+
+The JSON header carries ticker, date, count and, for each column, its name,
+dtype and byte offset from the start of the column data, which itself begins
+at the first 8-byte boundary after the header. Every column starts on an
+8-byte boundary so the browser can view it with a typed array without
+copying. Timestamps are int32 epoch seconds of the exchange wall-clock time,
+prices float32, and volume uint32 (float64 if a bar exceeds the uint32 range).
+Requested indicators follow as float32 'indicator.<name>' columns, NaN
+during their warm-up bars.
+
+Multi-day responses (COMPACT_STREAM_CONTENT_TYPE) are a sequence of such
+payloads, one per day, each prefixed with its uint32 byte length.
+"""
+import json
+import struct
+import numpy as np
+
+COMPACT_CONTENT_TYPE = 'application/vnd.onemchart.ohlcv'
+COMPACT_STREAM_CONTENT_TYPE = 'application/vnd.onemchart.ohlcv-stream'
+MAGIC = b'OMC1'
+
+def wants_compact(request, content_type=COMPACT_CONTENT_TYPE, text_type='application/json'):
+    """True when the client asked for the compact format by query param or Accept header"""
+    if request.args.get('format') == 'binary':
+        return True
+    best = request.accept_mimetypes.best_match([content_type, text_type])
+    return best == content_type and request.accept_mimetypes[content_type] > 0
+
+def chart_data_dict(df, ticker, date, indicators=None, extra=None):
+    """The JSON chart_data object get_chart has always returned, plus any requested indicator series"""
+    chart_data = {
+        'timestamp': df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S').tolist(),
+        'open': df['open'].tolist(),
+        'high': df['high'].tolist(),
+        'low': df['low'].tolist(),
+        'close': df['close'].tolist(),
+        'volume': df['volume'].tolist(),
+        'ticker': ticker,
+        'date': date,
+        'count': len(df)  # Update count to reflect filtered/resampled data
+    }
+    if extra:
+        chart_data.update(extra)
+    if indicators:
+        chart_data['indicators'] = {
+            name: [None if np.isnan(value) else value for value in values.tolist()]
+            for name, values in indicators.items()
+        }
+    return chart_data
+
+def _pad(length, alignment=8):
+    return (-length) % alignment
+
+def encode_columns(columns, header):
+    """Pack an ordered dict of (name -> numpy array) behind a JSON header"""
+    header = dict(header, columns=[])
+    offset = 0
+    for name, values in columns.items():
+        header['columns'].append({'name': name, 'dtype': values.dtype.name, 'offset': offset})
+        offset += values.nbytes + _pad(values.nbytes)
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+
+    parts = [MAGIC, struct.pack('<I', len(header_bytes)), header_bytes]
+    parts.append(b'\x00' * _pad(len(MAGIC) + 4 + len(header_bytes)))
+    for values in columns.values():
+        parts.append(values.tobytes())
+        parts.append(b'\x00' * _pad(values.nbytes))
+    return b''.join(parts)
+
+def encode_chart_compact(df, ticker, date, extra_header=None, indicators=None):
+    timestamps = df['timestamp'].to_numpy(dtype='datetime64[ns]').astype('datetime64[s]').astype('<i4')
+    volume = df['volume'].to_numpy(dtype=np.float64)
+    if len(volume) and (volume.max() > np.iinfo(np.uint32).max or volume.min() < 0):
+        volume = volume.astype('<f8')
+    else:
+        volume = volume.astype('<u4')
+    columns = {
+        'timestamp': timestamps,
+        'open': df['open'].to_numpy(dtype='<f4'),
+        'high': df['high'].to_numpy(dtype='<f4'),
+        'low': df['low'].to_numpy(dtype='<f4'),
+        'close': df['close'].to_numpy(dtype='<f4'),
+        'volume': volume
+    }
+    for name, values in (indicators or {}).items():
+        columns[f'indicator.{name}'] = values.astype('<f4')
+    header = {'version': 1, 'ticker': ticker, 'date': date, 'count': len(df)}
+    if extra_header:
+        header.update(extra_header)
+    return encode_columns(columns, header)
+
+def stream_frame(payload):
+    """Length-prefix one compact payload for a multi-day stream"""
+    return struct.pack('<I', len(payload)) + payload
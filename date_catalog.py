@@ -0,0 +1,157 @@
+"""Precomputed catalog of trading dates per ticker.
+
+The distinct dates of every shard are collected once and persisted as a
+sorted int32 array of days since the epoch in data/db/date_catalog/<TICKER>.npz,
+together with a fingerprint (name, mtime and size) of the shards they came
+from. A catalog is rebuilt automatically when any of its shard files change.
+
+    python date_catalog.py [TICKER ...]       # build catalogs ahead of time
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+import threading
+import numpy as np
+
+from candle_db import DB_DIR, TICKERS, get_db_paths, map_shards, valid_dates_query
+
+CATALOG_DIR = os.path.join(DB_DIR, "date_catalog")
+
+def shard_fingerprint(db_paths):
+    fingerprint = []
+    for db_path in db_paths:
+        stat = os.stat(db_path)
+        fingerprint.append([os.path.basename(db_path), stat.st_mtime, stat.st_size])
+    return json.dumps(fingerprint)
+
+def days_to_strings(days):
+    return np.datetime_as_string(days.astype('datetime64[D]')).tolist()
+
+def scan_trading_days(ticker, db_paths):
+    """Collect the distinct trading days of a ticker across its shards as sorted int32 epoch days"""
+    dates = set()
+    for shard_dates in map_shards(db_paths, lambda conn, db_path: conn.execute(
+            valid_dates_query(conn, db_path), (ticker,)).fetchall()):
+        dates.update(row[0] for row in shard_dates if row[0])
+    days = np.array(sorted(dates), dtype='datetime64[D]').astype(np.int32)
+    return days
+
+class DateCatalog:
+    def __init__(self, catalog_dir=CATALOG_DIR, sample_filter=None):
+        self.catalog_dir = catalog_dir
+        self.sample_filter = sample_filter
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _path(self, ticker):
+        return os.path.join(self.catalog_dir, f"{ticker}.npz")
+
+    def _load(self, ticker, fingerprint):
+        try:
+            with np.load(self._path(ticker)) as data:
+                if str(data['fingerprint']) != fingerprint:
+                    return None
+                return data['days']
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save(self, ticker, fingerprint, days):
+        path = self._path(ticker)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        try:
+            os.makedirs(self.catalog_dir, exist_ok=True)
+            np.savez(tmp_path, days=days, fingerprint=np.array(fingerprint))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not persist date catalog for {ticker}: {str(e)}")
+
+    def _build_entry(self, ticker, fingerprint, db_paths):
+        days = self._load(ticker, fingerprint)
+        if days is None:
+            days = scan_trading_days(ticker, db_paths)
+            self._save(ticker, fingerprint, days)
+            logging.info(f"Built date catalog for {ticker}: {len(days)} dates")
+        dates = days_to_strings(days)
+        return {
+            'fingerprint': fingerprint,
+            'days': days,
+            'dates': dates,
+            'sample_dates': self.sample_filter(dates) if self.sample_filter else dates
+        }
+
+    def entry(self, ticker):
+        """Return the catalog entry for a ticker, rebuilding it if its shards changed"""
+        db_paths = get_db_paths(ticker)
+        if not db_paths:
+            return None
+        fingerprint = shard_fingerprint(db_paths)
+        entry = self._entries.get(ticker)
+        if entry is not None and entry['fingerprint'] == fingerprint:
+            return entry
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is None or entry['fingerprint'] != fingerprint:
+                entry = self._build_entry(ticker, fingerprint, db_paths)
+                self._entries[ticker] = entry
+        return entry
+
+    def add_days(self, ticker, dates, known_days):
+        """Merge newly ingested dates into a catalog without rescanning the shards.
+
+        known_days is the entry's 'days' array captured before the shards were
+        written; the merged catalog is stored under the shards' new fingerprint.
+        """
+        db_paths = get_db_paths(ticker)
+        if not db_paths:
+            return None
+        fingerprint = shard_fingerprint(db_paths)
+        new_days = np.array([str(date) for date in dates], dtype='datetime64[D]').astype(np.int32)
+        days = np.union1d(known_days, new_days).astype(np.int32)
+        with self._lock:
+            self._save(ticker, fingerprint, days)
+            self._entries.pop(ticker, None)
+        return self.entry(ticker)
+
+    def dates(self, ticker, sample_mode=False):
+        """Sorted YYYY-MM-DD trading dates for a ticker (the sample-mode subset if requested), or None"""
+        entry = self.entry(ticker)
+        if entry is None:
+            return None
+        return entry['sample_dates'] if sample_mode else entry['dates']
+
+    def dates_between(self, ticker, start_date, end_date):
+        """Trading dates of a ticker within [start_date, end_date] (inclusive), or None"""
+        entry = self.entry(ticker)
+        if entry is None:
+            return None
+        start, end = np.array([str(start_date), str(end_date)], dtype='datetime64[D]').astype(np.int32)
+        lo = np.searchsorted(entry['days'], start, side='left')
+        hi = np.searchsorted(entry['days'], end, side='right')
+        return entry['dates'][lo:hi]
+
+    def warm(self, tickers):
+        for ticker in tickers:
+            try:
+                self.entry(ticker)
+            except Exception as e:
+                logging.warning(f"Could not build date catalog for {ticker}: {str(e)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the per-ticker trading date catalogs")
+    parser.add_argument('tickers', nargs='*', help='Tickers to build (default: all)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    catalog = DateCatalog()
+    for ticker in args.tickers or TICKERS:
+        dates = catalog.dates(ticker)
+        if dates is None:
+            logging.warning(f"No database files found for {ticker}")
+            continue
+        print(f"{ticker:<6} {len(dates):>6} dates  {dates[0] if dates else '-'} .. {dates[-1] if dates else '-'}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
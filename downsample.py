@@ -0,0 +1,75 @@
+"""Largest-Triangle-Three-Buckets downsampling for overview charts.
+
+The close series is reduced to max_points bars with LTTB: the first and
+last bars are kept, the rest are split into equal-count buckets, and each
+bucket keeps the bar forming the largest triangle with the bar kept from
+the previous bucket and the average of the next one, so spikes survive.
+Each kept bar also carries its bucket's envelope (first open, highest
+high, lowest low, summed volume), computed with reduceat.
+
+Bucket averages, envelopes and per-bucket triangle areas are NumPy
+operations; only the chain of selected anchors is walked bucket by bucket.
+"""
+import numpy as np
+import pandas as pd
+
+def lttb_buckets(n, max_points):
+    """Start index of every bucket: [0], max_points - 2 equal-count middle buckets, [n - 1]"""
+    every = (n - 2) / (max_points - 2)
+    middle = (np.floor(np.arange(max_points - 1) * every).astype(np.int64) + 1)
+    return np.concatenate(([0], middle[:-1], [n - 1]))
+
+def lttb_indices(x, y, max_points):
+    """Indices of the bars LTTB keeps from the (x, y) series, always including the first and last"""
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n), np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    starts = lttb_buckets(n, max_points)
+    counts = np.diff(np.concatenate((starts, [n])))
+    avg_x = np.add.reduceat(x, starts) / counts
+    avg_y = np.add.reduceat(y, starts) / counts
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    anchor = 0
+    for bucket in range(1, max_points - 1):
+        lo, hi = starts[bucket], starts[bucket + 1]
+        ax, ay = x[anchor], y[anchor]
+        cx, cy = avg_x[bucket + 1], avg_y[bucket + 1]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        anchor = lo + int(np.argmax(area))
+        selected[bucket] = anchor
+    return selected, starts
+
+def downsample_frame(df, max_points):
+    """Reduce a chart frame to at most max_points bars; returns (frame, kept row positions)"""
+    if max_points is None or len(df) <= max_points:
+        return df, np.arange(len(df))
+    timestamps = df['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    selected, starts = lttb_indices(timestamps, df['close'].to_numpy(dtype=np.float64), max_points)
+    volume = df['volume'].to_numpy()
+    if volume.dtype == object:
+        volume = volume.astype(np.float64)
+    downsampled = pd.DataFrame({
+        'timestamp': df['timestamp'].to_numpy()[selected],
+        'open': df['open'].to_numpy(dtype=np.float64)[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(dtype=np.float64), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(dtype=np.float64), starts),
+        'close': df['close'].to_numpy(dtype=np.float64)[selected],
+        'volume': np.add.reduceat(volume, starts)
+    })
+    return downsampled, selected
+
+MIN_MAX_POINTS = 10
+
+def parse_max_points(value):
+    """Validate a max_points= value; None when absent, otherwise an int >= MIN_MAX_POINTS (raises ValueError)"""
+    if value in (None, ''):
+        return None
+    max_points = int(value)
+    if max_points < MIN_MAX_POINTS:
+        raise ValueError(f'max_points must be at least {MIN_MAX_POINTS}')
+    return max_points
@@ -0,0 +1,177 @@
+"""Vectorized gap-trading backtests over the historical gap days.
+
+A ticker's regular-session minute candles are laid out once as (days, 391)
+open/high/low/close matrices, one column per minute from 9:30 to 16:00,
+NaN where a minute has no bar. A backtest selects the rows of the gap days
+that match the filters and evaluates every trade in one pass:
+
+    side         fade (trade toward the previous close) or follow (trade with the gap)
+    entry_minute enter at the open of the bar this many minutes after 9:30
+    target       'fill' (the previous close, fade only) or a move in % from the entry
+    stop_pct     adverse move in % from the entry (optional)
+
+First touches come from running extremes: np.maximum.accumulate of the
+highs (np.minimum.accumulate of the lows) is monotone along the day, so
+the first minute it reaches a level is the number of minutes before it.
+If the target and the stop are first touched in the same minute, the stop
+is assumed to come first, and a bar that opens beyond a level fills at its
+open. Trades still open at the last bar exit at its close.
+"""
+import numpy as np
+
+SESSION_MINUTES = 391  # 9:30 through 16:00 inclusive, as filter_regular_hours
+SESSION_START_MINUTE = 9 * 60 + 30
+BACKTEST_SIDES = ('fade', 'follow')
+MAX_STOP_PCT = 50.0
+
+def candle_matrix(df, session_start_seconds):
+    """(dates, {'open', 'high', 'low', 'close': (days, SESSION_MINUTES) arrays}) from sorted 1-minute candles"""
+    seconds = df['timestamp'].to_numpy(dtype='datetime64[ns]').astype('datetime64[s]').astype(np.int64)
+    column = (seconds % 86400 - session_start_seconds) // 60
+    keep = (column >= 0) & (column < SESSION_MINUTES)
+    day_seconds, row = np.unique((seconds - seconds % 86400)[keep], return_inverse=True)
+    dates = np.datetime_as_string(day_seconds.astype('datetime64[s]'), unit='D')
+    matrices = {}
+    for name in ('open', 'high', 'low', 'close'):
+        matrix = np.full((len(dates), SESSION_MINUTES), np.nan)
+        matrix[row, column[keep]] = df[name].to_numpy(dtype=np.float64)[keep]
+        matrix.setflags(write=False)
+        matrices[name] = matrix
+    return dates, matrices
+
+def _percent(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def parse_backtest_rules(args):
+    """Validate side/entry_minute/target/stop_pct request args into a rules dict; raises ValueError"""
+    side = (args.get('side') or 'fade').lower()
+    if side not in BACKTEST_SIDES:
+        raise ValueError(f"side must be one of {', '.join(BACKTEST_SIDES)}")
+    entry_minute = args.get('entry_minute') or '0'
+    if not entry_minute.strip().isdigit() or not 0 <= int(entry_minute) < SESSION_MINUTES - 1:
+        raise ValueError(f'entry_minute must be between 0 and {SESSION_MINUTES - 2}')
+    entry_minute = int(entry_minute)
+    target = (args.get('target') or 'fill').lower()
+    if target == 'fill':
+        if side != 'fade':
+            raise ValueError("target=fill only applies to side=fade")
+        target_pct = None
+    else:
+        target_pct = _percent(target)
+        if target_pct is None or not 0 < target_pct <= MAX_STOP_PCT:
+            raise ValueError(f'target must be fill or a percentage between 0 and {MAX_STOP_PCT}')
+    stop_pct = _percent(args['stop_pct']) if args.get('stop_pct') else None
+    if args.get('stop_pct') and (stop_pct is None or not 0 < stop_pct <= MAX_STOP_PCT):
+        raise ValueError(f'stop_pct must be between 0 and {MAX_STOP_PCT}')
+    return {'side': side, 'entry_minute': entry_minute, 'target_pct': target_pct, 'stop_pct': stop_pct}
+
+def _first_touch(running, level, favorable_up):
+    """Column of the first minute a running extreme reaches level (SESSION_MINUTES when it never does)"""
+    reached = running >= level[:, None] if favorable_up else running <= level[:, None]
+    return running.shape[1] - reached.sum(axis=1)
+
+def run_backtest(matrices, rows, direction, prev_close, rules):
+    """Per-trade results for the matrix rows of the selected gap days.
+
+    direction is +1 for gap up, -1 for gap down; returns a dict of arrays
+    (entry, exit, return_pct, exit_reason, exit_minute) aligned with rows.
+    """
+    start = rules['entry_minute']
+    opens = matrices['open'][rows, start:]
+    highs = np.where(np.isnan(matrices['high'][rows, start:]), -np.inf, matrices['high'][rows, start:])
+    lows = np.where(np.isnan(matrices['low'][rows, start:]), np.inf, matrices['low'][rows, start:])
+    closes = matrices['close'][rows, start:]
+    entry = opens[:, 0]
+    # Long (+1) when fading a gap down or following a gap up
+    side = -direction if rules['side'] == 'fade' else direction
+    long = side > 0
+
+    if rules['target_pct'] is None:
+        target = prev_close.astype(np.float64)
+    else:
+        target = entry * (1 + side * rules['target_pct'] / 100)
+    stop = entry * (1 - side * rules['stop_pct'] / 100) if rules['stop_pct'] is not None else np.where(long, -np.inf, np.inf)
+
+    running_high = np.maximum.accumulate(highs, axis=1)
+    running_low = np.minimum.accumulate(lows, axis=1)
+    target_at = np.where(long, _first_touch(running_high, target, True), _first_touch(running_low, target, False))
+    stop_at = np.where(long, _first_touch(running_low, stop, False), _first_touch(running_high, stop, True))
+
+    width = opens.shape[1]
+    hit_stop = stop_at < width
+    hit_target = (target_at < width) & ~(hit_stop & (stop_at <= target_at))
+    hit_stop &= ~hit_target
+    # Last bar with a close, for trades still open at the end of the day
+    last = width - 1 - np.argmax(~np.isnan(closes[:, ::-1]), axis=1)
+    exit_minute = np.where(hit_target, target_at, np.where(hit_stop, stop_at, last))
+    bar_open = np.take_along_axis(opens, np.minimum(exit_minute, width - 1)[:, None], axis=1)[:, 0]
+    bar_open = np.where(np.isnan(bar_open), np.where(hit_target, target, stop), bar_open)
+    # A bar opening beyond the level fills at its open
+    target_fill = np.where(long, np.maximum(target, bar_open), np.minimum(target, bar_open))
+    stop_fill = np.where(long, np.minimum(stop, bar_open), np.maximum(stop, bar_open))
+    exit_price = np.where(hit_target, target_fill,
+                          np.where(hit_stop, stop_fill, closes[np.arange(len(rows)), last]))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return_pct = side * (exit_price - entry) / entry * 100
+    return {
+        'entry': entry,
+        'exit': exit_price,
+        'return_pct': return_pct,
+        'exit_reason': np.where(hit_target, 'target', np.where(hit_stop, 'stop', 'close')),
+        'exit_minute': exit_minute + start
+    }
+
+def summarize_trades(return_pct):
+    """Win rate, expectancy and compounded equity curve of a sequence of trade returns in %"""
+    equity = np.cumprod(1 + return_pct / 100)
+    peak = np.maximum.accumulate(np.r_[1.0, equity])[1:]
+    wins = return_pct[return_pct > 0]
+    losses = return_pct[return_pct <= 0]
+    trades = len(return_pct)
+    return {
+        'trades': trades,
+        'wins': len(wins),
+        'win_rate': round(len(wins) / trades * 100, 2) if trades else 0,
+        'average_win_pct': round(float(wins.mean()), 4) if len(wins) else 0,
+        'average_loss_pct': round(float(losses.mean()), 4) if len(losses) else 0,
+        'expectancy_pct': round(float(return_pct.mean()), 4) if trades else 0,
+        'total_return_pct': round(float(equity[-1] - 1) * 100, 4) if trades else 0,
+        'max_drawdown_pct': round(float(((equity - peak) / peak).min()) * 100, 4) if trades else 0
+    }, equity
+
+def _minute_clock(minute):
+    hours, minutes = divmod(SESSION_START_MINUTE + int(minute), 60)
+    return f"{hours:02d}:{minutes:02d}"
+
+def backtest_gap_days(dates, matrices, gaps, rules):
+    """Backtest rules over gap-table rows; returns (summary, per-trade equity curve, days without candles)"""
+    gap_dates = gaps['date'].astype(str).to_numpy()
+    rows = np.searchsorted(dates, gap_dates)
+    found = rows < len(dates)
+    found[found] = dates[rows[found]] == gap_dates[found]
+    found[found] = ~np.isnan(matrices['open'][rows[found], rules['entry_minute']])
+    order = np.argsort(gap_dates[found], kind='stable')
+    traded = gaps[found].iloc[order]
+    rows = rows[found][order]
+    direction = np.where(traded['gap_direction'].astype(str).to_numpy() == 'up', 1, -1)
+    result = run_backtest(matrices, rows, direction, traded['prev_close'].to_numpy(dtype=np.float64), rules)
+    summary, equity = summarize_trades(result['return_pct'])
+    curve = [
+        {
+            'date': date,
+            'gap_direction': 'up' if up > 0 else 'down',
+            'entry': round(float(entry), 4),
+            'exit': round(float(exit_price), 4),
+            'exit_time': _minute_clock(minute),
+            'exit_reason': reason,
+            'return_pct': round(float(return_pct), 4) + 0.0,
+            'equity': round(float(value), 6)
+        }
+        for date, up, entry, exit_price, minute, reason, return_pct, value in zip(
+            traded['date'].astype(str), direction, result['entry'], result['exit'], result['exit_minute'],
+            result['exit_reason'], result['return_pct'], equity)
+    ]
+    return summary, curve, int((~found).sum())
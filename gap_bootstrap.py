@@ -0,0 +1,55 @@
+"""Bootstrap confidence intervals for the gap-insight statistics.
+
+Small filter combinations (a handful of 1.5%+ Monday gaps) make medians
+noisy, so each cube entry carries a percentile bootstrap interval for the
+fill rate, median time to fill and the median moves. For a group of n
+values, resamples are drawn as a (resamples, n) matrix of indices and the
+statistic is taken along axis 1, in chunks so the matrix stays small.
+Groups are spread over a process pool when the cube is built; every group
+gets its own seed from BOOTSTRAP_SEED, so intervals are reproducible
+whichever worker computes them.
+"""
+import os
+import logging
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+BOOTSTRAP_RESAMPLES = int(os.environ.get('GAP_BOOTSTRAP_RESAMPLES', 2000))
+BOOTSTRAP_CONFIDENCE = 0.95
+BOOTSTRAP_SEED = int(os.environ.get('GAP_BOOTSTRAP_SEED', 20240101))
+# 0 or 1 computes in-process
+BOOTSTRAP_WORKERS = int(os.environ.get('GAP_BOOTSTRAP_WORKERS', os.cpu_count() or 1))
+# Resample matrix cells per chunk (about 16 MB of float64)
+BOOTSTRAP_CHUNK_CELLS = 2000000
+
+def bootstrap_interval(values, statistic, resamples, rng):
+    """(low, high) percentile interval of statistic ('mean' or 'median') over resamples of values; None when empty"""
+    n = len(values)
+    if n == 0:
+        return None
+    reduce = np.mean if statistic == 'mean' else np.median
+    estimates = np.empty(resamples)
+    chunk = max(1, BOOTSTRAP_CHUNK_CELLS // n)
+    for start in range(0, resamples, chunk):
+        rows = min(chunk, resamples - start)
+        estimates[start:start + rows] = reduce(values[rng.integers(0, n, size=(rows, n))], axis=1)
+    tail = (1 - BOOTSTRAP_CONFIDENCE) / 2 * 100
+    low, high = np.percentile(estimates, [tail, 100 - tail])
+    return float(low), float(high)
+
+def bootstrap_group(samples, resamples, seed):
+    """{metric: (low, high) or None} for one group's {metric: (values, statistic)} samples"""
+    rng = np.random.default_rng(seed)
+    return {metric: bootstrap_interval(values, statistic, resamples, rng) for metric, (values, statistic) in samples.items()}
+
+def bootstrap_groups(groups, resamples=BOOTSTRAP_RESAMPLES, workers=BOOTSTRAP_WORKERS):
+    """bootstrap_group for every group's samples, over a process pool when workers > 1"""
+    seeds = np.random.SeedSequence(BOOTSTRAP_SEED).spawn(len(groups))
+    if workers > 1 and len(groups) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(groups))) as pool:
+                return list(pool.map(bootstrap_group, groups, [resamples] * len(groups), seeds,
+                                     chunksize=max(1, len(groups) // (workers * 4))))
+        except Exception as e:
+            logging.warning(f"Bootstrap process pool failed, computing in-process: {str(e)}")
+    return [bootstrap_group(samples, resamples, seed) for samples, seed in zip(groups, seeds)]
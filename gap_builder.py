@@ -0,0 +1,261 @@
+"""Build the gap dataset for any ticker from its 1-minute candles.
+
+    python gap_builder.py                     # every ticker that has candle shards
+    python gap_builder.py NVDA MSFT --workers 4
+    python gap_builder.py --insights data/qqq_central_data_updated.csv
+
+Writes data/gap_data_<ticker>.csv with the columns of
+qqq_central_data_updated.csv, so the gap endpoints can serve any ticker,
+and its precomputed insight cube (gap_insights.py) next to it; --insights
+builds only the cube of existing gap CSVs, such as the curated QQQ one.
+Every (ticker, year) is an independent task on a process pool; each task
+reads its year (plus the end of the previous one, for the first previous
+close) and derives all of its days at once with reduceat over the
+regular-session bars, with no per-day Python loop.
+
+Definitions, per regular-session day (9:30-16:00, as filter_regular_hours):
+
+    gap                 (open - prev_close) / prev_close in %; days under GAP_MIN_PCT are dropped
+    filled, fill_time   the first bar trading back to prev_close; time_to_fill_minutes from 9:30
+    max_move_..._30min  furthest move from the open in the gap direction during the first 30 minutes
+    reversal_after_fill after the fill, price comes back through prev_close by REVERSAL_PCT toward
+                        the gap side; exit_time is that bar, or 16:00 when it never happens
+    move_before_...     furthest move past prev_close in the fill direction before the reversal
+    time_of_low/high    first bar printing the session low / high
+    low_after_median    time_of_low later than the ticker's median time_of_low
+    high_before_median  time_of_high earlier than the ticker's median time_of_high
+"""
+import os
+import sys
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from candle_db import (
+    DATA_DIR, TICKERS, REGULAR_SESSION_START_SECONDS, REGULAR_SESSION_END_SECONDS,
+    get_db_paths, map_shards, shard_features
+)
+from shard_manifest import ShardManifest
+from date_catalog import DateCatalog
+from gap_table import clock_to_minutes, load_gap_frame
+from gap_insights import build_insight_cube, save_insight_cube
+
+GAP_COLUMNS = [
+    'timestamp', 'open', 'high', 'low', 'close', 'volume', 'date', 'prev_close', 'gap', 'abs_gap',
+    'filled', 'fill_time', 'gap_size_bin', 'gap_direction', 'max_move_gap_direction_first_30min_pct',
+    'time_to_fill_minutes', 'reversal_after_fill', 'exit_time', 'move_before_reversal_fill_direction_pct',
+    'day_of_week', 'time_of_low', 'time_of_high', 'low_after_median', 'high_before_median'
+]
+
+GAP_MIN_PCT = 0.15
+# Lower bound of each gap_size_bin, in %
+GAP_SIZE_BINS = [(0.15, '0.15-0.35%'), (0.35, '0.35-0.5%'), (0.5, '0.5-1%'), (1.0, '1-1.5%'), (1.5, '1.5%+')]
+REVERSAL_PCT = 0.1
+FIRST_MOVE_MINUTES = 30
+MARKET_TIMEZONE = 'America/New_York'
+
+GAP_BUILD_WORKERS = int(os.environ.get('GAP_BUILD_WORKERS', os.cpu_count() or 1))
+
+RANGE_QUERY = """
+    SELECT timestamp, open, high, low, close, volume
+    FROM candles
+    WHERE ticker = ? AND DATE(timestamp) BETWEEN ? AND ?
+    ORDER BY timestamp
+"""
+
+RANGE_QUERY_BY_TRADE_DATE = """
+    SELECT timestamp, open, high, low, close, volume
+    FROM candles
+    WHERE ticker = ? AND trade_date BETWEEN ? AND ?
+    ORDER BY timestamp
+"""
+
+def gap_data_path(ticker, data_dir=DATA_DIR):
+    return os.path.join(data_dir, f"gap_data_{ticker.lower()}.csv")
+
+def load_range_candles(ticker, start_date, end_date):
+    """1-minute candles for a ticker over [start_date, end_date], sorted"""
+    db_paths = ShardManifest().shards_for_range(ticker, get_db_paths(ticker), start_date, end_date)
+
+    def read(conn, db_path):
+        query = RANGE_QUERY_BY_TRADE_DATE if shard_features(conn, db_path)['trade_date'] else RANGE_QUERY
+        return pd.read_sql_query(query, conn, params=(ticker, str(start_date), str(end_date)), parse_dates=['timestamp'])
+
+    frames = map_shards(db_paths, read)
+    if not frames:
+        return pd.DataFrame(columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    return pd.concat(frames, ignore_index=True).sort_values('timestamp', kind='stable')
+
+def _first_index(mask, starts, size):
+    """Per day, the first bar index where mask holds, or size when it never does"""
+    return np.minimum.reduceat(np.where(mask, np.arange(size), size), starts)
+
+def _clock(seconds):
+    return pd.to_datetime(seconds, unit='s')
+
+def _with_offset(seconds):
+    """Naive market-time epoch seconds -> 'YYYY-MM-DD HH:MM:SS-04:00' strings, as the QQQ CSV writes fill_time"""
+    text = _clock(seconds).tz_localize(MARKET_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S%z')
+    return pd.Series(text).str.replace(r'([+-]\d{2})(\d{2})$', r'\1:\2', regex=True).to_numpy()
+
+def compute_gap_days(df):
+    """Gap rows (without the median flags) for every day in a sorted frame of 1-minute candles"""
+    seconds = df['timestamp'].to_numpy(dtype='datetime64[ns]').astype('datetime64[s]').astype(np.int64)
+    in_session = (seconds % 86400 >= REGULAR_SESSION_START_SECONDS) & (seconds % 86400 <= REGULAR_SESSION_END_SECONDS)
+    seconds = seconds[in_session]
+    if len(seconds) == 0:
+        return pd.DataFrame(columns=GAP_COLUMNS[:-2])
+    opens, highs, lows, closes = (df[column].to_numpy(dtype=np.float64)[in_session] for column in ('open', 'high', 'low', 'close'))
+    volumes = df['volume'].to_numpy(dtype=np.float64)[in_session]
+    size = len(seconds)
+    index = np.arange(size)
+
+    day_seconds = seconds - seconds % 86400
+    starts = np.flatnonzero(np.r_[True, day_seconds[1:] != day_seconds[:-1]])
+    counts = np.diff(np.r_[starts, size])
+    bar_day = np.repeat(np.arange(len(starts)), counts)
+    session_start = day_seconds[starts] + REGULAR_SESSION_START_SECONDS
+
+    day_open = opens[starts]
+    day_close = closes[starts + counts - 1]
+    day_high = np.maximum.reduceat(highs, starts)
+    day_low = np.minimum.reduceat(lows, starts)
+    prev_close = np.r_[np.nan, day_close[:-1]]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        gap = (day_open - prev_close) / prev_close * 100
+    up = gap > 0
+    bar_up = up[bar_day]
+    bar_prev = prev_close[bar_day]
+
+    # Fill: the first bar trading back to the previous close
+    fill = _first_index(np.where(bar_up, lows <= bar_prev, highs >= bar_prev), starts, size)
+    filled = fill < size
+    fill_seconds = np.where(filled, seconds[np.minimum(fill, size - 1)], 0)
+
+    # Furthest move in the gap direction during the first minutes
+    early = seconds < session_start[bar_day] + FIRST_MOVE_MINUTES * 60
+    early_high = np.maximum.reduceat(np.where(early, highs, -np.inf), starts)
+    early_low = np.minimum.reduceat(np.where(early, lows, np.inf), starts)
+    first_move = np.where(up, early_high - day_open, day_open - early_low) / day_open * 100
+
+    # Reversal: after the fill bar, back through the previous close by REVERSAL_PCT toward the gap side
+    after_fill = filled[bar_day] & (index > fill[bar_day])
+    reversal_level = np.where(bar_up, highs >= bar_prev * (1 + REVERSAL_PCT / 100), lows <= bar_prev * (1 - REVERSAL_PCT / 100))
+    reversal = _first_index(after_fill & reversal_level, starts, size)
+    reversed_ = filled & (reversal < size)
+    between = filled[bar_day] & (index >= fill[bar_day]) & (index < reversal[bar_day])
+    lowest_before = np.minimum.reduceat(np.where(between, lows, np.inf), starts)
+    highest_before = np.maximum.reduceat(np.where(between, highs, -np.inf), starts)
+    with np.errstate(invalid='ignore'):
+        move_before = np.where(up, prev_close - lowest_before, highest_before - prev_close) / prev_close * 100
+    exit_seconds = np.where(reversed_, seconds[np.minimum(reversal, size - 1)], day_seconds[starts] + REGULAR_SESSION_END_SECONDS)
+
+    low_at = _first_index(lows == day_low[bar_day], starts, size)
+    high_at = _first_index(highs == day_high[bar_day], starts, size)
+
+    dates = _clock(day_seconds[starts])
+    abs_gap = np.abs(gap)
+    bins = np.array([label for _, label in GAP_SIZE_BINS], dtype=object)
+    bin_index = np.searchsorted([lower for lower, _ in GAP_SIZE_BINS], abs_gap, side='right') - 1
+    out = pd.DataFrame({
+        'timestamp': dates.tz_localize(MARKET_TIMEZONE).tz_convert('UTC').strftime('%Y-%m-%d %H:%M:%S'),
+        'open': day_open,
+        'high': day_high,
+        'low': day_low,
+        'close': day_close,
+        'volume': np.add.reduceat(volumes, starts),
+        'date': dates.strftime('%Y-%m-%d'),
+        'prev_close': prev_close,
+        'gap': gap,
+        'abs_gap': abs_gap,
+        'filled': filled,
+        'fill_time': np.where(filled, _with_offset(fill_seconds), None),
+        'gap_size_bin': bins[np.clip(bin_index, 0, len(bins) - 1)],
+        'gap_direction': np.where(up, 'up', 'down'),
+        'max_move_gap_direction_first_30min_pct': np.maximum(first_move, 0),
+        'time_to_fill_minutes': np.where(filled, (fill_seconds - session_start) / 60, np.nan),
+        'reversal_after_fill': pd.array(np.where(filled, reversed_, False), dtype='boolean'),
+        'exit_time': np.where(filled, _with_offset(exit_seconds), None),
+        'move_before_reversal_fill_direction_pct': np.where(reversed_, np.maximum(move_before, 0), np.nan),
+        'day_of_week': dates.day_name(),
+        'time_of_low': _clock(seconds[low_at]).strftime('%H:%M:%S'),
+        'time_of_high': _clock(seconds[high_at]).strftime('%H:%M:%S')
+    })
+    out.loc[~filled, 'reversal_after_fill'] = pd.NA
+    return out[(abs_gap >= GAP_MIN_PCT) & ~np.isnan(prev_close)].reset_index(drop=True)
+
+def build_year(ticker, year):
+    """Gap rows for one ticker and calendar year (the previous December supplies the first previous close)"""
+    df = load_range_candles(ticker, f"{year - 1}-12-01", f"{year}-12-31")
+    rows = compute_gap_days(df)
+    return rows[rows['date'].str.startswith(str(year))]
+
+def add_median_flags(rows):
+    """low_after_median / high_before_median against the median time of the ticker's lows and highs"""
+    low_minutes = clock_to_minutes(rows['time_of_low'])
+    high_minutes = clock_to_minutes(rows['time_of_high'])
+    rows['low_after_median'] = low_minutes > low_minutes.median()
+    rows['high_before_median'] = high_minutes < high_minutes.median()
+    return rows
+
+def build_gap_datasets(tickers, workers=GAP_BUILD_WORKERS, data_dir=DATA_DIR):
+    """Build and write the gap CSV of each ticker; returns {ticker: rows written}"""
+    catalog = DateCatalog()
+    tasks = []
+    for ticker in tickers:
+        years = sorted({int(str(date)[:4]) for date in catalog.dates(ticker) or []})
+        tasks.extend((ticker, year) for year in years)
+    logging.info(f"Building gap data for {len(tickers)} tickers in {len(tasks)} (ticker, year) tasks")
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(build_year, *zip(*tasks)))
+    else:
+        results = [build_year(ticker, year) for ticker, year in tasks]
+
+    written = {}
+    for ticker in tickers:
+        frames = [rows for (task_ticker, _), rows in zip(tasks, results) if task_ticker == ticker and not rows.empty]
+        if not frames:
+            logging.warning(f"No gap days found for {ticker}")
+            continue
+        rows = add_median_flags(pd.concat(frames, ignore_index=True))[GAP_COLUMNS]
+        path = gap_data_path(ticker, data_dir)
+        rows.to_csv(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+        written[ticker] = len(rows)
+        logging.info(f"Wrote {len(rows)} {ticker} gaps to {os.path.basename(path)}")
+        build_insight_file(path, workers)
+    return written
+
+def build_insight_file(path, workers=GAP_BUILD_WORKERS):
+    """Precompute the insight cube, bootstrap intervals included, of one gap CSV and save it next to it"""
+    cube = build_insight_cube(load_gap_frame(path), workers=workers)
+    logging.info(f"Wrote {len(cube)} insight combinations to {os.path.basename(save_insight_cube(cube, path))}")
+    return len(cube)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build per-ticker gap datasets from the candle shards")
+    parser.add_argument('tickers', nargs='*', help='Tickers to build (default: every ticker with shards)')
+    parser.add_argument('--workers', type=int, default=GAP_BUILD_WORKERS, help='Worker processes')
+    parser.add_argument('--insights', nargs='+', metavar='CSV', help='Only build the insight cube of these gap CSVs')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.insights:
+        for path in args.insights:
+            print(f"{path}: {build_insight_file(path, workers=args.workers)} insight combinations")
+        return 0
+    tickers = [ticker.upper() for ticker in args.tickers] or [ticker for ticker in TICKERS if get_db_paths(ticker)]
+    invalid = [ticker for ticker in tickers if ticker not in TICKERS]
+    if invalid:
+        logging.error(f"Invalid tickers requested: {', '.join(invalid)}")
+        return 1
+    written = build_gap_datasets(tickers, workers=args.workers)
+    for ticker, count in written.items():
+        print(f"{ticker}: {count} gaps")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
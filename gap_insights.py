@@ -0,0 +1,232 @@
+"""Gap-insight cube: every /api/gap_insights statistic for every filter combination.
+
+For each (gap_size_bin, day_of_week, gap_direction) key, and for every
+rollup where one or more of those axes is GAP_ANY, the cube holds the
+fill rate, reversal-after-fill rate, time to fill, move-before-fill,
+max move on unfilled gaps, move before reversal and the time of the low
+and high. The cube is built with one groupby per axis subset (eight in
+total), so the endpoint only looks a key up and adds the live-price
+overlay on top. insight_stats computes the same statistics for any other
+row set, such as the result of a multi-filter gap query.
+
+Each entry also carries a distributions block: p10/p25/p75/p90 and a
+fixed-bin histogram of time to fill, move before reversal and the
+first-30-minute max move, computed for all groups from one sort per
+metric, and bootstrap confidence intervals (gap_bootstrap.py) for the fill
+rate and the median time to fill and moves, keyed by the insight they
+qualify.
+
+Statistics over the filled (or unfilled) gaps of a combination that has
+none are 0, as the endpoint always reported them; NaN means the rows
+exist but the column is empty.
+
+The bootstrap makes a full cube build the expensive part, so it is built
+offline (gap_builder.py) and saved next to its CSV as <name>.insights.json,
+tagged with the CSV's SHA-1 and the bootstrap settings. load_insight_cube
+returns None when that file is missing or stale.
+"""
+import os
+import json
+import hashlib
+import itertools
+import numpy as np
+import pandas as pd
+
+from gap_bootstrap import BOOTSTRAP_CONFIDENCE, BOOTSTRAP_RESAMPLES, BOOTSTRAP_SEED, BOOTSTRAP_WORKERS, bootstrap_groups
+
+GAP_ANY = 'any'
+GAP_AXES = ['gap_size_bin', 'day_of_week', 'gap_direction']
+
+GAP_INSIGHT_COLUMNS = [
+    'gap_size_bin', 'day_of_week', 'gap_direction', 'filled',
+    'move_before_reversal_fill_direction_pct', 'max_move_gap_direction_first_30min_pct',
+    'time_of_low', 'time_of_high', 'reversal_after_fill', 'time_to_fill_minutes'
+]
+
+MOVE_BEFORE_REVERSAL = 'move_before_reversal_fill_direction_pct'
+MAX_MOVE_FIRST_30MIN = 'max_move_gap_direction_first_30min_pct'
+
+TOTAL_STATS = {
+    'count': ('filled', 'size'),
+    'gap_fill_rate': ('filled', 'mean'),
+    'reversal_after_fill_rate': ('reversal_after_fill', 'mean'),
+    'median_move_before_reversal_pct': (MOVE_BEFORE_REVERSAL, 'median'),
+    'average_move_before_reversal_pct': (MOVE_BEFORE_REVERSAL, 'mean'),
+    'median_low_minutes': ('time_of_low_minutes', 'median'),
+    'average_low_minutes': ('time_of_low_minutes', 'mean'),
+    'median_high_minutes': ('time_of_high_minutes', 'median'),
+    'average_high_minutes': ('time_of_high_minutes', 'mean')
+}
+FILLED_STATS = {
+    'median_time_to_fill': ('time_to_fill_minutes', 'median'),
+    'average_time_to_fill': ('time_to_fill_minutes', 'mean'),
+    'median_move_before_fill_pct': (MOVE_BEFORE_REVERSAL, 'median'),
+    'average_move_before_fill_pct': (MOVE_BEFORE_REVERSAL, 'mean')
+}
+UNFILLED_STATS = {
+    'median_max_move_unfilled_pct': (MAX_MOVE_FIRST_30MIN, 'median'),
+    'average_max_move_unfilled_pct': (MAX_MOVE_FIRST_30MIN, 'mean')
+}
+
+# Distribution blocks: metric -> (column, rows it is taken over, fixed histogram edges).
+# The last bin also collects everything above its upper edge.
+DISTRIBUTION_METRICS = {
+    'time_to_fill_minutes': ('time_to_fill_minutes', 'filled', [0, 5, 15, 30, 60, 90, 120, 180, 240, 300, 390]),
+    'move_before_reversal_fill_direction_pct': (MOVE_BEFORE_REVERSAL, 'all', [0, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0]),
+    'max_move_gap_direction_first_30min_pct': (MAX_MOVE_FIRST_30MIN, 'unfilled', [0, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0])
+}
+DISTRIBUTION_PERCENTILES = (10, 25, 75, 90)
+
+def _round(value):
+    return None if np.isnan(value) else round(float(value), 2)
+
+def _distributions(df, codes, groups, populations):
+    """Percentiles and fixed-bin histograms of every DISTRIBUTION_METRICS column for each group code"""
+    blocks = [{} for _ in range(groups)]
+    for metric, (column, population, edges) in DISTRIBUTION_METRICS.items():
+        values = df[column].to_numpy(dtype=np.float64)
+        keep = populations[population] & ~np.isnan(values) & (codes >= 0)
+        values, group_codes = values[keep], codes[keep]
+        # One sort orders every group's values; each group is then a contiguous sorted run
+        order = np.lexsort((values, group_codes))
+        values, group_codes = values[order], group_codes[order]
+        starts = np.searchsorted(group_codes, np.arange(groups), side='left')
+        counts = np.searchsorted(group_codes, np.arange(groups), side='right') - starts
+        percentiles = {q: np.full(groups, np.nan) for q in DISTRIBUTION_PERCENTILES}
+        for q in DISTRIBUTION_PERCENTILES if len(values) else ():
+            # np.percentile's default linear interpolation, read off the sorted runs
+            last = np.maximum(counts - 1, 0)
+            position = q / 100 * last
+            below = np.floor(position).astype(np.int64)
+            low = values[np.minimum(starts + below, len(values) - 1)]
+            high = values[np.minimum(starts + np.minimum(below + 1, last), len(values) - 1)]
+            percentiles[q] = np.where(counts > 0, low + (position - below) * (high - low), np.nan)
+        bins = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 2)
+        histograms = np.bincount(group_codes * (len(edges) - 1) + bins,
+                                 minlength=groups * (len(edges) - 1)).reshape(groups, len(edges) - 1)
+        for group in range(groups):
+            block = {'count': int(counts[group])}
+            block.update({f'p{q}': _round(percentiles[q][group]) for q in DISTRIBUTION_PERCENTILES})
+            block['histogram'] = {'edges': edges, 'counts': histograms[group].tolist()}
+            blocks[group][metric] = block
+    return blocks
+
+# Bootstrap intervals: insight name -> (column, rows it is taken over, statistic, scale to the reported unit)
+CONFIDENCE_METRICS = {
+    'gap_fill_rate': ('filled', 'all', 'mean', 100),
+    'median_time_to_fill': ('time_to_fill_minutes', 'filled', 'median', 1),
+    'median_move_before_fill': (MOVE_BEFORE_REVERSAL, 'filled', 'median', 1),
+    'median_max_move_unfilled': (MAX_MOVE_FIRST_30MIN, 'unfilled', 'median', 1),
+    'median_move_before_reversal': (MOVE_BEFORE_REVERSAL, 'all', 'median', 1)
+}
+
+def _group_samples(df, codes, groups, populations):
+    """Per group, {insight name: (values, statistic)} for the CONFIDENCE_METRICS bootstrap"""
+    samples = [{} for _ in range(groups)]
+    for name, (column, population, statistic, scale) in CONFIDENCE_METRICS.items():
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan) * scale
+        keep = populations[population] & ~np.isnan(values) & (codes >= 0)
+        order = np.argsort(codes[keep], kind='stable')
+        values, group_codes = values[keep][order], codes[keep][order]
+        bounds = np.searchsorted(group_codes, np.arange(groups + 1), side='left')
+        for group in range(groups):
+            samples[group][name] = (values[bounds[group]:bounds[group + 1]], statistic)
+    return samples
+
+def _confidence_intervals(samples, intervals):
+    block = {}
+    for name, interval in intervals.items():
+        if interval is None:
+            block[name] = None
+        else:
+            block[name] = {'low': round(interval[0], 2), 'high': round(interval[1], 2),
+                           'level': BOOTSTRAP_CONFIDENCE, 'samples': len(samples[name][0])}
+    return block
+
+def _aggregate(df, keys, mask, stats, index=None):
+    """Named aggregations over the masked rows, grouped by the key Series; 0 for groups with no such rows"""
+    table = df[mask].groupby([key[mask] for key in keys], observed=True).agg(**stats)
+    if index is None:
+        return table
+    present = index.isin(table.index)
+    table = table.reindex(index)
+    table.loc[~present] = 0
+    return table
+
+def _insight_table(df, keys):
+    """Every insight statistic per group of the key Series"""
+    everything = np.ones(len(df), dtype=bool)
+    filled = (df['filled'] == True).fillna(False).to_numpy(dtype=bool)
+    unfilled = (df['filled'] == False).fillna(False).to_numpy(dtype=bool)
+    totals = _aggregate(df, keys, everything, TOTAL_STATS)
+    table = totals.join(_aggregate(df, keys, filled, FILLED_STATS, totals.index))
+    table = table.join(_aggregate(df, keys, unfilled, UNFILLED_STATS, totals.index))
+    rows = pd.Index(keys[0].to_numpy()) if len(keys) == 1 else pd.MultiIndex.from_arrays([key.to_numpy() for key in keys])
+    codes = table.index.get_indexer(rows)
+    populations = {'all': everything, 'filled': filled, 'unfilled': unfilled}
+    table['distributions'] = _distributions(df, codes, len(table), populations)
+    return table, _group_samples(df, codes, len(table), populations)
+
+def _rows(table):
+    rows = table.to_dict('records')
+    for row in rows:
+        row['count'] = int(row['count'])
+    return rows
+
+def build_insight_cube(df, workers=BOOTSTRAP_WORKERS):
+    """{(gap_size_bin, day_of_week, gap_direction): insight statistics}, GAP_ANY standing for every value of an axis"""
+    cube = {}
+    rows = []
+    samples = []
+    for kept in itertools.product([True, False], repeat=len(GAP_AXES)):
+        # A rolled-up axis is grouped on a constant GAP_ANY column, so every subset is one groupby
+        keys = [df[axis].astype(object) if keep else pd.Series(GAP_ANY, index=df.index, name=axis)
+                for axis, keep in zip(GAP_AXES, kept)]
+        table, table_samples = _insight_table(df, keys)
+        table_rows = _rows(table)
+        cube.update(zip(table.index, table_rows))
+        rows.extend(table_rows)
+        samples.extend(table_samples)
+    # Bootstrap every group of every subset in one batch so the process pool stays busy
+    intervals = bootstrap_groups(samples, workers=workers)
+    for row, group_samples, group_intervals in zip(rows, samples, intervals):
+        row['confidence_intervals'] = _confidence_intervals(group_samples, group_intervals)
+    return cube
+
+def insight_cube_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.insights.json'
+
+def _cube_fingerprint(csv_path):
+    """What a saved cube was built from: the CSV's content hash and the bootstrap settings"""
+    with open(csv_path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return {'source_sha1': digest, 'resamples': BOOTSTRAP_RESAMPLES, 'seed': BOOTSTRAP_SEED, 'confidence': BOOTSTRAP_CONFIDENCE}
+
+def save_insight_cube(cube, csv_path):
+    """Write the cube built from csv_path next to it"""
+    path = insight_cube_path(csv_path)
+    document = {'fingerprint': _cube_fingerprint(csv_path), 'cells': [[list(key), row] for key, row in cube.items()]}
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(document, f, separators=(',', ':'))
+    os.replace(path + '.tmp', path)
+    return path
+
+def load_insight_cube(csv_path):
+    """The saved cube of csv_path, or None when there is none or it was built from other data or settings"""
+    try:
+        with open(insight_cube_path(csv_path), 'r', encoding='utf-8') as f:
+            document = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if document.get('fingerprint') != _cube_fingerprint(csv_path):
+        return None
+    return {tuple(key): row for key, row in document['cells']}
+
+def insight_stats(df):
+    """The insight statistics of an arbitrary row set (e.g. a gap query result), or None when it is empty"""
+    if df.empty:
+        return None
+    table, samples = _insight_table(df, [pd.Series(GAP_ANY, index=df.index)])
+    row = _rows(table)[0]
+    row['confidence_intervals'] = _confidence_intervals(samples[0], bootstrap_groups(samples, workers=1)[0])
+    return row
@@ -0,0 +1,121 @@
+"""Multi-value gap queries answered from per-value bitmaps.
+
+Every value of gap_size_bin, day_of_week, gap_direction, the gap's year
+and filled gets a packed bitmap (one bit per gap row) when the gap table
+loads. A query ORs the bitmaps of the values selected for each filter and
+ANDs the filters together; a fill-time window is turned into a bitmap by
+a binary search over the rows sorted by fill_time_minutes. Query
+parameters (each multi-value one takes repeated or comma-separated
+values):
+
+    gap_size, day, gap_direction     one or more bins / weekdays / directions
+    year_from, year_to               inclusive year range
+    filled                           true or false
+    fill_from, fill_to               HH:MM window the gap was filled in (inclusive)
+"""
+import re
+import numpy as np
+
+GAP_QUERY_COLUMNS = {'gap_size': 'gap_size_bin', 'day': 'day_of_week', 'gap_direction': 'gap_direction'}
+GAP_QUERY_PARAMS = set(GAP_QUERY_COLUMNS) | {'year_from', 'year_to', 'filled', 'fill_from', 'fill_to'}
+MAX_QUERY_VALUES = 20
+
+CLOCK_PARAM_PATTERN = re.compile(r'^(\d{1,2}):(\d{2})$')
+
+def _pack(mask):
+    return np.packbits(np.asarray(mask, dtype=bool))
+
+class GapBitmaps:
+    def __init__(self, df):
+        self.count = len(df)
+        self.bitmaps = {}
+        for column in GAP_QUERY_COLUMNS.values():
+            if column in df.columns:
+                values = df[column].astype(object).to_numpy()
+                self.bitmaps[column] = {value: _pack(values == value) for value in set(values) if isinstance(value, str)}
+        if 'date' in df.columns:
+            years = df['date'].astype(str).str.slice(0, 4)
+            years = years.where(years.str.isdigit(), '0').astype(int).to_numpy()
+            self.bitmaps['year'] = {int(year): _pack(years == year) for year in np.unique(years) if year}
+        if 'filled' in df.columns:
+            filled = df['filled'].astype('boolean')
+            self.bitmaps['filled'] = {True: _pack(filled.eq(True).fillna(False)), False: _pack(filled.eq(False).fillna(False))}
+        self.fill_order = np.empty(0, dtype=np.int64)
+        self.fill_sorted = np.empty(0)
+        if 'fill_time_minutes' in df.columns:
+            minutes = df['fill_time_minutes'].to_numpy(dtype=np.float64)
+            known = np.flatnonzero(~np.isnan(minutes))
+            self.fill_order = known[np.argsort(minutes[known], kind='stable')]
+            self.fill_sorted = minutes[self.fill_order]
+
+    def _empty(self):
+        return np.zeros((self.count + 7) // 8, dtype=np.uint8)
+
+    def _any_of(self, column, values):
+        """OR of the bitmaps of the given values (values the table never saw match nothing)"""
+        result = self._empty()
+        for value in values:
+            bitmap = self.bitmaps.get(column, {}).get(value)
+            if bitmap is not None:
+                result |= bitmap
+        return result
+
+    def _fill_window(self, lo, hi):
+        mask = np.zeros(self.count, dtype=bool)
+        start = np.searchsorted(self.fill_sorted, lo, side='left')
+        stop = np.searchsorted(self.fill_sorted, hi, side='right')
+        mask[self.fill_order[start:stop]] = True
+        return _pack(mask)
+
+    def positions(self, filters):
+        """Row positions matching every filter, ascending"""
+        result = np.full((self.count + 7) // 8, 0xFF, dtype=np.uint8)
+        for param, column in GAP_QUERY_COLUMNS.items():
+            if filters.get(param):
+                result &= self._any_of(column, filters[param])
+        if 'year_from' in filters or 'year_to' in filters:
+            years = sorted(self.bitmaps.get('year', {}))
+            lo = filters.get('year_from', years[0] if years else 0)
+            hi = filters.get('year_to', years[-1] if years else 0)
+            result &= self._any_of('year', [year for year in years if lo <= year <= hi])
+        if 'filled' in filters:
+            result &= self._any_of('filled', [filters['filled']])
+        if 'fill_from' in filters or 'fill_to' in filters:
+            result &= self._fill_window(filters.get('fill_from', 0), filters.get('fill_to', 24 * 60 - 1))
+        return np.flatnonzero(np.unpackbits(result, count=self.count))
+
+def _clock_param(value, name):
+    match = CLOCK_PARAM_PATTERN.match(value.strip())
+    if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+        raise ValueError(f'{name} must be HH:MM')
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+def is_gap_query(args):
+    """True when request args use anything beyond the single gap_size/day/gap_direction of the original gap filter"""
+    if any(args.get(param) for param in GAP_QUERY_PARAMS - set(GAP_QUERY_COLUMNS)):
+        return True
+    return any(len(args.getlist(param)) > 1 or ',' in (args.get(param) or '') for param in GAP_QUERY_COLUMNS)
+
+def parse_gap_query(args):
+    """Validate gap query args (a werkzeug MultiDict) into a filter dict for GapBitmaps.positions; raises ValueError"""
+    filters = {}
+    for param in GAP_QUERY_COLUMNS:
+        values = [value.strip() for raw in args.getlist(param) for value in raw.split(',') if value.strip()]
+        if len(values) > MAX_QUERY_VALUES:
+            raise ValueError(f'At most {MAX_QUERY_VALUES} values for {param}')
+        if values:
+            filters[param] = values
+    for param in ('year_from', 'year_to'):
+        if args.get(param):
+            if not args[param].strip().isdigit():
+                raise ValueError(f'{param} must be a year')
+            filters[param] = int(args[param])
+    if args.get('filled'):
+        filled = args['filled'].strip().lower()
+        if filled not in ('true', 'false'):
+            raise ValueError('filled must be true or false')
+        filters['filled'] = filled == 'true'
+    for param in ('fill_from', 'fill_to'):
+        if args.get(param):
+            filters[param] = _clock_param(args[param], param)
+    return filters
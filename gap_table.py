@@ -0,0 +1,164 @@
+"""Process-level, typed copies of the gap and previous high/low datasets.
+
+Each CSV is parsed once per process (and again only when its mtime
+changes). The gap frame gets categorical gap_size_bin / day_of_week /
+gap_direction, boolean filled / reversal_after_fill, and its time_of_low,
+time_of_high, fill_time and exit_time clocks pre-parsed into float
+minutes after midnight (<column>_minutes, NaN when missing); the
+previous high/low frame gets categorical open_position / day_of_week /
+touch_type. A group index maps each (gap_size_bin, day_of_week,
+gap_direction) key straight to its row positions, so a filter is one dict
+lookup and an iloc; the gap-insight cube (gap_insights.py) is read from the file gap_builder.py saves
+next to the CSV, and only computed in-process, without a process pool, when
+that file is missing or stale.
+"""
+import os
+import logging
+import threading
+import numpy as np
+import pandas as pd
+
+from gap_insights import GAP_INSIGHT_COLUMNS, build_insight_cube, load_insight_cube
+from gap_query import GapBitmaps
+
+GAP_CATEGORY_COLUMNS = ['gap_size_bin', 'day_of_week', 'gap_direction']
+GAP_BOOL_COLUMNS = ['filled', 'reversal_after_fill']
+GAP_TIME_COLUMNS = ['time_of_low', 'time_of_high', 'fill_time', 'exit_time']
+
+PREVIOUS_HIGH_LOW_CATEGORY_COLUMNS = ['open_position', 'day_of_week', 'touch_type']
+
+# The wall-clock part of 'HH:MM[:SS]' or 'YYYY-MM-DD HH:MM[:SS][+HH:MM]'; a trailing UTC offset is not a clock
+CLOCK_PATTERN = r'(?:^|[ T])(\d{1,2}):(\d{2})'
+# Where HH:MM starts in the two layouts the CSVs are written in
+CLOCK_OFFSETS = (0, 11)
+
+def _fixed_clock_minutes(chars, offset):
+    """Minutes from the HH:MM at a fixed offset of a (rows, width) code-point array; NaN where there is none"""
+    digits = chars[:, [offset, offset + 1, offset + 3, offset + 4]].astype(np.int64) - ord('0')
+    valid = (chars[:, offset + 2] == ord(':')) & ((digits >= 0) & (digits <= 9)).all(axis=1)
+    if offset:
+        valid &= (chars[:, offset - 1] == ord(' ')) | (chars[:, offset - 1] == ord('T'))
+    hours = digits[:, 0] * 10 + digits[:, 1]
+    minutes = digits[:, 2] * 10 + digits[:, 3]
+    valid &= (hours < 24) & (minutes < 60)
+    return np.where(valid, hours * 60 + minutes, np.nan)
+
+def clock_to_minutes(values):
+    """Clock or timestamp strings -> float minutes after midnight of their own wall clock (NaN when missing or malformed)"""
+    text = values.astype('string')
+    present = text.notna().to_numpy()
+    minutes = np.full(len(text), np.nan)
+    if present.any():
+        # Fixed-layout fast path: read the digits straight out of the UTF-32 code points
+        width = max(int(text[present].str.len().max()), max(CLOCK_OFFSETS) + 5)
+        chars = text[present].to_numpy(dtype=f'U{width}').view(np.uint32).reshape(-1, width)
+        parsed = _fixed_clock_minutes(chars, CLOCK_OFFSETS[0])
+        for offset in CLOCK_OFFSETS[1:]:
+            parsed = np.where(np.isnan(parsed), _fixed_clock_minutes(chars, offset), parsed)
+        minutes[present] = parsed
+    # Anything in another layout (e.g. a one-digit hour) falls back to the regex
+    leftover = present & np.isnan(minutes)
+    if leftover.any():
+        parts = text[leftover].str.extract(CLOCK_PATTERN)
+        minutes[leftover] = (pd.to_numeric(parts[0], errors='coerce') * 60 + pd.to_numeric(parts[1], errors='coerce')).to_numpy(dtype=np.float64)
+    return pd.Series(minutes, index=values.index)
+
+def _type_columns(df, category_columns=(), bool_columns=(), time_columns=()):
+    for column in category_columns:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    for column in bool_columns:
+        if column in df.columns:
+            df[column] = df[column].astype('boolean')
+    for column in time_columns:
+        if column in df.columns:
+            df[f'{column}_minutes'] = clock_to_minutes(df[column])
+    return df
+
+def load_gap_frame(path):
+    """Parse the gap CSV into the typed frame the gap endpoints filter"""
+    return _type_columns(pd.read_csv(path), GAP_CATEGORY_COLUMNS, GAP_BOOL_COLUMNS, GAP_TIME_COLUMNS)
+
+def load_previous_high_low_frame(path):
+    """Parse previuos_high_low.csv into the typed frame the previous high/low endpoint filters"""
+    return _type_columns(pd.read_csv(path), PREVIOUS_HIGH_LOW_CATEGORY_COLUMNS)
+
+class GapTable:
+    def __init__(self, path, loader=load_gap_frame, group_columns=GAP_CATEGORY_COLUMNS):
+        self.path = path
+        self.loader = loader
+        self.group_columns = group_columns
+        self._lock = threading.Lock()
+        self._state = None  # (mtime, frame, group index), swapped as a whole on reload
+        self._derived = {}  # name -> (frame it was built from, value)
+
+    def _current(self):
+        mtime = os.path.getmtime(self.path)
+        state = self._state
+        if state is not None and state[0] == mtime:
+            return state
+        with self._lock:
+            if self._state is None or self._state[0] != mtime:
+                df = self.loader(self.path)
+                groups = {}
+                if all(column in df.columns for column in self.group_columns):
+                    groups = df.groupby(self.group_columns, observed=True).indices
+                self._state = (mtime, df, groups)
+                logging.info(f"Loaded gap table {self.path}: {len(df)} rows, {len(groups)} groups")
+            return self._state
+
+    def frame(self):
+        """The typed gap frame, reloaded if the file changed; raises OSError if it cannot be read"""
+        return self._current()[1]
+
+    def select(self, *key):
+        """Rows for one group_columns key, e.g. (gap_size_bin, day_of_week, gap_direction), in file order"""
+        _, df, groups = self._current()
+        positions = groups.get(key)
+        if positions is None:
+            return df.iloc[:0]
+        return df.iloc[positions]
+
+    def _derive(self, name, build, df=None):
+        """A structure built from the current (or given) frame, rebuilt on first use after each reload"""
+        if df is None:
+            df = self._current()[1]
+        built_from, value = self._derived.get(name, (None, None))
+        if built_from is df:
+            return value
+        with self._lock:
+            built_from, value = self._derived.get(name, (None, None))
+            if built_from is not df:
+                value = build(df)
+                self._derived[name] = (df, value)
+            return value
+
+    def insight_cube(self):
+        """The gap-insight cube of the current frame"""
+        def build(df):
+            cube = load_insight_cube(self.path)
+            if cube is not None:
+                logging.info(f"Loaded gap insight cube for {self.path}: {len(cube)} combinations")
+                return cube
+            cube = {}
+            if all(column in df.columns for column in GAP_INSIGHT_COLUMNS):
+                logging.warning(f"No current insight cube for {self.path}; computing it in-process "
+                                f"(precompute it with: python gap_builder.py --insights {self.path})")
+                # Never fork a bootstrap pool from a web worker
+                cube = build_insight_cube(df, workers=1)
+            logging.info(f"Built gap insight cube: {len(cube)} combinations")
+            return cube
+        return self._derive('insight_cube', build)
+
+    def insights(self, gap_size, day, gap_direction):
+        """Precomputed insight statistics for one key (any axis may be GAP_ANY), or None"""
+        return self.insight_cube().get((gap_size, day, gap_direction))
+
+    def bitmaps(self):
+        """Per-value bitmaps of the current frame for multi-filter queries"""
+        return self._derive('bitmaps', GapBitmaps)
+
+    def query(self, filters):
+        """Rows matching a parse_gap_query filter set, in file order"""
+        df = self.frame()
+        return df.iloc[self._derive('bitmaps', GapBitmaps, df).positions(filters)]
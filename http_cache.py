@@ -0,0 +1,64 @@
+"""Conditional GET support for endpoints backed by data files that only change on redeploy.
+
+A view decorated with conditional_get gets a strong ETag built from a data
+version (supplied per request by a validator function) and the normalized
+query string. A request whose If-None-Match already holds that tag is
+answered with 304 before the view runs, so no SQLite or pandas work happens.
+Requests carrying a click-tracking param always run the view, so the
+per-session action limits it enforces are counted (and can answer 429).
+"""
+import os
+import hashlib
+import functools
+from flask import request, make_response
+
+# Click-tracking params: they do not change the response body, but a request
+# carrying one is never short-circuited, since the view counts the click
+ETAG_IGNORED_PARAMS = {'main_action', 'sample_action'}
+
+def file_version(*paths):
+    """Fingerprint (name, mtime, size) of the given files; missing files are skipped"""
+    parts = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        parts.append(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size}")
+    return ';'.join(parts)
+
+def request_etag(version):
+    """Strong ETag for the current request path and query under a data version"""
+    query = sorted((key, value) for key, value in request.args.items(multi=True) if key not in ETAG_IGNORED_PARAMS)
+    digest = hashlib.sha1(f"{version}|{request.path}|{query}".encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+def conditional_get(validator, vary=None):
+    """Decorate a view with ETag/304 handling.
+
+    validator() returns (version, cache_control) for the current request, or
+    None when the request should not be tagged (e.g. invalid parameters).
+    Only 200 and 304 responses carry the ETag, Cache-Control and Vary headers.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            validation = validator()
+            if validation is None:
+                return view(*args, **kwargs)
+            version, cache_control = validation
+            etag = request_etag(version)
+            counts_action = any(request.args.get(param) for param in ETAG_IGNORED_PARAMS)
+            if request.if_none_match.contains(etag) and not counts_action:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            if vary:
+                response.headers['Vary'] = vary
+            return response
+        return wrapped
+    return decorator
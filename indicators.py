@@ -0,0 +1,152 @@
+"""Vectorized technical indicators matching the calculate* functions in static/script.js.
+
+Every series is returned as a float64 array aligned with the input bars,
+NaN where the JavaScript version emits no point (the warm-up bars), so the
+value at bar i equals the JS value whose time is bar i. Recursive averages
+(EMA, Wilder's RSI smoothing) are evaluated block-wise as a decay-matrix
+product instead of a Python loop over bars.
+
+Indicator names accepted by parse_indicators:
+
+    sma_<period>, ema_<period>, vwap, rsi[_<period>], macd,
+    bollinger[_<period>], stochastic
+
+The dashboard still computes its own indicators in script.js; these series
+serve API clients that pass indicators=. benchmarks/check_indicator_parity.py
+checks the two implementations against each other.
+"""
+import re
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+INDICATOR_PATTERN = re.compile(r'^(sma|ema|rsi|bollinger)_(\d{1,3})$|^(vwap|rsi|macd|bollinger|stochastic)$')
+MAX_INDICATORS = 12
+
+RECURRENCE_BLOCK = 64
+
+def _linear_recurrence(x, a, b, y0):
+    """y[k] = a * y[k-1] + b * x[k] with y[-1] = y0, evaluated in blocks of lower-triangular decay matrices"""
+    y = np.empty(len(x))
+    steps = np.arange(RECURRENCE_BLOCK)
+    decay = np.tril(a ** np.clip(steps[:, None] - steps[None, :], 0, None))
+    carry = a ** (steps + 1)
+    for start in range(0, len(x), RECURRENCE_BLOCK):
+        block = x[start:start + RECURRENCE_BLOCK]
+        n = len(block)
+        y[start:start + n] = decay[:n, :n] @ (b * block) + carry[:n] * y0
+        y0 = y[start + n - 1]
+    return y
+
+def _window_sums(values, period):
+    return sliding_window_view(values, period).sum(axis=1)
+
+def sma(close, period):
+    out = np.full(len(close), np.nan)
+    if len(close) >= period:
+        out[period - 1:] = _window_sums(close, period) / period
+    return out
+
+def ema(close, period):
+    """calculateEMA: seeded with the SMA of the first period bars"""
+    out = np.full(len(close), np.nan)
+    if len(close) < period:
+        return out
+    multiplier = 2 / (period + 1)
+    seed = close[:period].sum() / period
+    out[period - 1] = seed
+    out[period:] = _linear_recurrence(close[period:], 1 - multiplier, multiplier, seed)
+    return out
+
+def vwap(high, low, close, volume):
+    typical = (high + low + close) / 3
+    cumulative_volume = np.cumsum(volume)
+    cumulative_tpv = np.cumsum(typical * volume)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(cumulative_volume > 0, cumulative_tpv / cumulative_volume, close)
+
+def rsi(close, period=14):
+    """calculateRSI, including its first smoothing step applied on top of the seed averages"""
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+    change = np.diff(close)
+    gains = np.where(change > 0, change, 0.0)
+    losses = np.where(change < 0, -change, 0.0)
+    decay = (period - 1) / period
+    avg_gain = _linear_recurrence(gains[period - 1:], decay, 1 / period, gains[:period].sum() / period)
+    avg_loss = _linear_recurrence(losses[period - 1:], decay, 1 / period, losses[:period].sum() / period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rs = np.where(avg_loss == 0, 100.0, avg_gain / avg_loss)
+    out[period:] = 100 - 100 / (1 + rs)
+    return out
+
+def macd(close, fast_period=12, slow_period=26, signal_period=9):
+    """calculateMACD -> (macd line, signal line, histogram)"""
+    line = ema(close, fast_period) - ema(close, slow_period)
+    signal = np.full(len(close), np.nan)
+    first = slow_period - 1
+    if len(close) > first:
+        signal[first:] = ema(line[first:], signal_period)
+    return line, signal, line - signal
+
+def bollinger(close, period=20, std_dev=2):
+    """calculateBollingerBands -> (upper, middle, lower), population standard deviation"""
+    middle = sma(close, period)
+    upper = np.full(len(close), np.nan)
+    lower = np.full(len(close), np.nan)
+    if len(close) >= period:
+        windows = sliding_window_view(close, period)
+        deviation = np.sqrt(((windows - middle[period - 1:, None]) ** 2).sum(axis=1) / period)
+        upper[period - 1:] = middle[period - 1:] + std_dev * deviation
+        lower[period - 1:] = middle[period - 1:] - std_dev * deviation
+    return upper, middle, lower
+
+def stochastic(high, low, close, k_period=14, d_period=3):
+    """calculateStochastic -> (%K, %D); %K is 50 when the window has no range"""
+    k = np.full(len(close), np.nan)
+    d = np.full(len(close), np.nan)
+    if len(close) < k_period:
+        return k, d
+    highest = sliding_window_view(high, k_period).max(axis=1)
+    lowest = sliding_window_view(low, k_period).min(axis=1)
+    span = highest - lowest
+    with np.errstate(invalid='ignore', divide='ignore'):
+        k[k_period - 1:] = np.where(span == 0, 50.0, (close[k_period - 1:] - lowest) / span * 100)
+    d[k_period - 1:] = sma(k[k_period - 1:], d_period)
+    return k, d
+
+def parse_indicators(spec):
+    """Split and validate an indicators= value; returns sorted unique names or raises ValueError"""
+    names = sorted({name.strip().lower() for name in (spec or '').split(',') if name.strip()})
+    if len(names) > MAX_INDICATORS:
+        raise ValueError(f'At most {MAX_INDICATORS} indicators per request')
+    for name in names:
+        match = INDICATOR_PATTERN.match(name)
+        if not match or (match.group(2) is not None and int(match.group(2)) < 1):
+            raise ValueError(f'Unknown indicator: {name}')
+    return names
+
+def compute_indicators(df, names):
+    """{series name: aligned float64 array} for the requested indicator names"""
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    series = {}
+    for name in names:
+        kind, _, period = name.partition('_')
+        if kind == 'sma':
+            series[name] = sma(close, int(period))
+        elif kind == 'ema':
+            series[name] = ema(close, int(period))
+        elif kind == 'vwap':
+            series[name] = vwap(high, low, close, df['volume'].to_numpy(dtype=np.float64))
+        elif kind == 'rsi':
+            series[name] = rsi(close, int(period or 14))
+        elif kind == 'macd':
+            series['macd'], series['macd_signal'], series['macd_histogram'] = macd(close)
+        elif kind == 'bollinger':
+            prefix = name
+            series[f'{prefix}_upper'], series[f'{prefix}_middle'], series[f'{prefix}_lower'] = bollinger(close, int(period or 20))
+        elif kind == 'stochastic':
+            series['stochastic_k'], series['stochastic_d'] = stochastic(high, low, close)
+    return series
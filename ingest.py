@@ -0,0 +1,237 @@
+"""Append 1-minute OHLCV files to the candle shard databases.
+
+    python ingest.py NVDA new_days.csv                # add days not stored yet
+    python ingest.py QQQ 2025-06-*.parquet --replace  # overwrite days already stored
+
+Input files need timestamp (or datetime), open, high, low, close and volume
+columns; a ticker column, if present, is used to keep only the requested
+ticker's rows. The app opens shards with immutable=1, so a shard is never
+written in place: its rows are deleted and bulk-inserted in one transaction
+on a private copy, which then replaces the live file with os.replace.
+Readers keep the old file until the pool sees the new mtime.
+
+QQQ parts hold disjoint date ranges. A day goes to the part whose range
+covers it, otherwise to the last part starting before it (the first part for
+days older than every part); only days after every part are appended to the
+last part, until that file reaches QQQ_PART_MAX_BYTES and a new one starts.
+
+Afterwards the shard manifest, the valid-dates catalog and the rollups are
+updated for the ingested days only; nothing is rebuilt from scratch. The
+rollup file is read with immutable=1 too, so it gets the same private-copy
+and os.replace treatment as the shards.
+"""
+import os
+import sys
+import bisect
+import logging
+import argparse
+import sqlite3
+import pandas as pd
+
+from candle_db import DB_DIR, TICKERS, get_db_paths, qqq_db_paths, qqq_part_path, writable_copy
+from optimize_db import INDEX_NAME
+from shard_manifest import ShardManifest
+from date_catalog import DateCatalog
+from rollups import build_rollups
+from candle_store import CandleStore
+
+# Keep every QQQ part under the 100 MB per-file limit of the git host the shards are deployed from
+QQQ_PART_MAX_BYTES = int(os.environ.get('QQQ_PART_MAX_BYTES', 95 * 1000 * 1000))
+
+INSERT_BATCH_ROWS = 100000
+
+NEW_SHARD_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS candles (
+        ticker TEXT,
+        timestamp TEXT,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume INTEGER,
+        trade_date TEXT
+    );
+    CREATE INDEX IF NOT EXISTS {INDEX_NAME}
+        ON candles (ticker, trade_date, timestamp, open, high, low, close, volume);
+    CREATE TABLE IF NOT EXISTS tickers (
+        ticker TEXT PRIMARY KEY,
+        first_date TEXT,
+        last_date TEXT,
+        row_count INTEGER
+    );
+"""
+
+def read_candle_file(path, ticker):
+    """Read one CSV/Parquet file into sorted, de-duplicated candle rows for a ticker"""
+    if path.lower().endswith(('.parquet', '.pq')):
+        try:
+            df = pd.read_parquet(path)
+        except ImportError:
+            raise ValueError("Parquet input needs pyarrow or fastparquet installed")
+    else:
+        df = pd.read_csv(path)
+    df.columns = [str(column).strip().lower() for column in df.columns]
+    if 'timestamp' not in df.columns and 'datetime' in df.columns:
+        df = df.rename(columns={'datetime': 'timestamp'})
+    missing = [column for column in ('timestamp', 'open', 'high', 'low', 'close', 'volume') if column not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    if 'ticker' in df.columns:
+        df = df[df['ticker'].astype(str).str.upper() == ticker]
+    df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']].copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    if getattr(df['timestamp'].dt, 'tz', None) is not None:
+        df['timestamp'] = df['timestamp'].dt.tz_convert('America/New_York').dt.tz_localize(None)
+    df = df.dropna(subset=['timestamp']).drop_duplicates('timestamp', keep='last').sort_values('timestamp')
+    return df
+
+def shard_columns(conn):
+    return {row[1] for row in conn.execute("PRAGMA table_info(candles)")}
+
+def target_shard(ticker):
+    """Shard file new rows for a ticker are appended to (created on first write)"""
+    if ticker != 'QQQ':
+        return os.path.join(DB_DIR, f"stock_data_{ticker.lower()}.db")
+    parts = qqq_db_paths()
+    if parts and os.path.getsize(parts[-1]) < QQQ_PART_MAX_BYTES:
+        return parts[-1]
+    next_part = len(parts) + 1
+    logging.info(f"Starting QQQ part {next_part}")
+    return qqq_part_path(next_part)
+
+def day_shards(ticker, dates, manifest):
+    """{shard path: sorted dates} for the days being written, keeping QQQ part ranges disjoint"""
+    if ticker != 'QQQ':
+        return {target_shard(ticker): list(dates)} if dates else {}
+    ranges = []
+    for db_path in qqq_db_paths():
+        info = manifest.shard_range(ticker, db_path)
+        if info is not None and info['rows']:
+            ranges.append((info['min_date'], info['max_date'], db_path))
+    ranges.sort()
+    starts = [min_date for min_date, _, _ in ranges]
+    shards = {}
+    for date in dates:
+        if not ranges or date > ranges[-1][1]:
+            db_path = target_shard(ticker)
+        else:
+            # The covering part, else the last one starting before the day: its range grows into the gap only
+            db_path = ranges[max(bisect.bisect_right(starts, date) - 1, 0)][2]
+        shards.setdefault(db_path, []).append(date)
+    return shards
+
+def delete_days(conn, ticker, dates):
+    """Remove a ticker's rows for the given dates; returns rows deleted"""
+    has_trade_date = 'trade_date' in shard_columns(conn)
+    deleted = 0
+    for date in dates:
+        if has_trade_date:
+            cursor = conn.execute("DELETE FROM candles WHERE ticker = ? AND trade_date = ?", (ticker, date))
+        else:
+            cursor = conn.execute("DELETE FROM candles WHERE ticker = ? AND DATE(timestamp) = ?", (ticker, date))
+        deleted += cursor.rowcount
+    return deleted
+
+def refresh_tickers_table(conn, ticker):
+    """Recompute one ticker's row in the tickers table (on shards that have one)"""
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tickers'").fetchone() is None:
+        return
+    conn.execute("DELETE FROM tickers WHERE ticker = ?", (ticker,))
+    conn.execute("""
+        INSERT INTO tickers (ticker, first_date, last_date, row_count)
+        SELECT ticker, substr(MIN(timestamp), 1, 10), substr(MAX(timestamp), 1, 10), COUNT(*)
+        FROM candles WHERE ticker = ? GROUP BY ticker
+    """, (ticker,))
+
+def insert_rows(conn, ticker, df):
+    """Bulk-insert candle rows in batches"""
+    has_trade_date = 'trade_date' in shard_columns(conn)
+    timestamps = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    columns = [[ticker] * len(df), timestamps, df['open'].astype(float), df['high'].astype(float),
+               df['low'].astype(float), df['close'].astype(float), df['volume'].astype('int64')]
+    if has_trade_date:
+        columns.append(timestamps.str.slice(0, 10))
+        sql = "INSERT INTO candles (ticker, timestamp, open, high, low, close, volume, trade_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    else:
+        sql = "INSERT INTO candles (ticker, timestamp, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)"
+    rows = list(zip(*columns))
+    for start in range(0, len(rows), INSERT_BATCH_ROWS):
+        conn.executemany(sql, rows[start:start + INSERT_BATCH_ROWS])
+
+def write_shard(db_path, ticker, df, replace_dates):
+    """Replace replace_dates and insert df's rows in one shard, as one atomic file swap; returns rows deleted"""
+    new_shard = not os.path.exists(db_path)
+    with writable_copy(db_path) as conn:
+        if new_shard:
+            # New shards start out in the layout optimize_db.py produces
+            conn.executescript(NEW_SHARD_SCHEMA)
+        conn.execute("BEGIN")
+        deleted = delete_days(conn, ticker, replace_dates)
+        insert_rows(conn, ticker, df)
+        refresh_tickers_table(conn, ticker)
+        conn.execute("COMMIT")
+        if new_shard:
+            conn.execute("ANALYZE")
+    return deleted
+
+def ingest(ticker, paths, replace=False):
+    """Ingest candle files for one ticker; returns the list of dates written"""
+    frames = [read_candle_file(path, ticker) for path in paths]
+    df = pd.concat(frames, ignore_index=True).drop_duplicates('timestamp', keep='last').sort_values('timestamp')
+    if df.empty:
+        logging.warning(f"No {ticker} rows found in {', '.join(paths)}")
+        return []
+    df['date'] = df['timestamp'].dt.strftime('%Y-%m-%d')
+
+    catalog = DateCatalog()
+    entry = catalog.entry(ticker)
+    known_days = entry['days'] if entry else []
+    stored = set(entry['dates']) if entry else set()
+    incoming = sorted(df['date'].unique())
+    existing = [date for date in incoming if date in stored]
+    if existing and not replace:
+        logging.info(f"Skipping {len(existing)} {ticker} days already stored (use --replace to overwrite)")
+        df = df[~df['date'].isin(existing)]
+        existing = []
+    if df.empty:
+        return []
+
+    written = sorted(df['date'].unique())
+    manifest = ShardManifest()
+    # A stored day is inside its shard's range, so replaced days are routed back to the shard holding them
+    for db_path, dates in day_shards(ticker, written, manifest).items():
+        rows = df[df['date'].isin(dates)].drop(columns='date')
+        deleted = write_shard(db_path, ticker, rows, [date for date in dates if date in existing])
+        logging.info(f"Inserted {len(rows)} {ticker} rows for {len(dates)} days into {os.path.basename(db_path)}"
+                     + (f", replacing {deleted} rows" if deleted else ""))
+
+    manifest.refresh(get_db_paths(ticker))
+    catalog.add_days(ticker, written, known_days)
+    # Rolls the new days up on a private copy of rollups_<ticker>.db and swaps it in, like the shards
+    build_rollups(ticker, dates=written, rebuild=True)
+    if CandleStore().has_ticker(ticker):
+        logging.warning(f"Columnar store for {ticker} is now stale; rebuild it with: python candle_store.py build {ticker}")
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append 1-minute OHLCV files to the candle shards")
+    parser.add_argument('ticker', help='Ticker the files belong to')
+    parser.add_argument('paths', nargs='+', help='CSV or Parquet files')
+    parser.add_argument('--replace', action='store_true', help='Overwrite days that are already stored')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    ticker = args.ticker.upper()
+    if ticker not in TICKERS:
+        logging.error(f"Invalid ticker requested: {ticker}")
+        return 1
+    try:
+        written = ingest(ticker, args.paths, replace=args.replace)
+    except (OSError, ValueError) as e:
+        logging.error(f"Ingest failed: {str(e)}")
+        return 1
+    print(f"{ticker}: {len(written)} days ingested" + (f" ({written[0]} .. {written[-1]})" if written else ""))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Upgrade the candle shard databases in place for faster chart queries.
+
+For each stock_data_*.db file this adds a stored trade_date column, a
+covering index on (ticker, trade_date, timestamp) that includes the OHLCV
+columns, a small tickers metadata table, ANALYZE statistics, and finally
+VACUUMs the file with a tuned page size. Query plans and timings for the SQL
+the app runs are printed before and after.
+
+    python optimize_db.py                       # all shards in data/db
+    python optimize_db.py data/db/stock_data_nvda.db --page-size 16384
+"""
+import os
+import sys
+import glob
+import time
+import logging
+import argparse
+import sqlite3
+import statistics
+
+from candle_db import (
+    DB_DIR, CHART_QUERY, VALID_DATES_QUERY, TICKERS_QUERY,
+    CHART_QUERY_BY_TRADE_DATE, VALID_DATES_QUERY_BY_TRADE_DATE, TICKERS_TABLE_QUERY
+)
+from shard_manifest import ShardManifest
+
+INDEX_NAME = "idx_candles_ticker_trade_date"
+
+def sample_params(conn):
+    """Pick a ticker and a date from the middle of the shard to time queries with"""
+    row = conn.execute("""
+        SELECT ticker, DATE(timestamp) FROM candles
+        WHERE rowid >= (SELECT MAX(rowid) FROM candles) / 2
+        LIMIT 1
+    """).fetchone()
+    return row if row else (None, None)
+
+def time_query(conn, sql, params, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def report_queries(conn, label, queries):
+    print(f"  -- {label}")
+    for name, sql, params in queries:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        print(f"  {name}: {time_query(conn, sql, params):.2f} ms")
+        for row in plan:
+            print(f"      {row[-1]}")
+
+def app_queries(ticker, date, optimized):
+    queries = [
+        ('chart', CHART_QUERY, (ticker, date)),
+        ('valid_dates', VALID_DATES_QUERY, (ticker,)),
+        ('tickers', TICKERS_QUERY, ())
+    ]
+    if optimized:
+        queries += [
+            ('chart (trade_date)', CHART_QUERY_BY_TRADE_DATE, (ticker, date)),
+            ('valid_dates (trade_date)', VALID_DATES_QUERY_BY_TRADE_DATE, (ticker,)),
+            ('tickers (table)', TICKERS_TABLE_QUERY, ())
+        ]
+    return queries
+
+def optimize_shard(db_path, page_size=8192, vacuum=True):
+    print(f"{db_path} ({os.path.getsize(db_path) / 1e6:.1f} MB)")
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        ticker, date = sample_params(conn)
+        if ticker is None:
+            print("  empty shard, skipping")
+            return
+        report_queries(conn, f"before (ticker={ticker}, date={date})", app_queries(ticker, date, optimized=False))
+
+        start = time.perf_counter()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(candles)")}
+        conn.execute("BEGIN")
+        if 'trade_date' not in columns:
+            conn.execute("ALTER TABLE candles ADD COLUMN trade_date TEXT")
+        conn.execute("UPDATE candles SET trade_date = DATE(timestamp) WHERE trade_date IS NULL")
+        conn.execute(f"""
+            CREATE INDEX IF NOT EXISTS {INDEX_NAME}
+            ON candles (ticker, trade_date, timestamp, open, high, low, close, volume)
+        """)
+        conn.execute("DROP TABLE IF EXISTS tickers")
+        conn.execute("""
+            CREATE TABLE tickers (
+                ticker TEXT PRIMARY KEY,
+                first_date TEXT,
+                last_date TEXT,
+                row_count INTEGER
+            )
+        """)
+        conn.execute("""
+            INSERT INTO tickers (ticker, first_date, last_date, row_count)
+            SELECT ticker, MIN(trade_date), MAX(trade_date), COUNT(*) FROM candles GROUP BY ticker
+        """)
+        conn.execute("COMMIT")
+        conn.execute("ANALYZE")
+        logging.info(f"Added trade_date, {INDEX_NAME} and tickers table in {time.perf_counter() - start:.1f}s")
+
+        if vacuum:
+            start = time.perf_counter()
+            # page_size only takes effect on VACUUM, and not in WAL mode
+            conn.execute("PRAGMA journal_mode = DELETE")
+            conn.execute(f"PRAGMA page_size = {int(page_size)}")
+            conn.execute("VACUUM")
+            logging.info(f"VACUUM with page_size={page_size} in {time.perf_counter() - start:.1f}s")
+
+        report_queries(conn, "after", app_queries(ticker, date, optimized=True))
+    finally:
+        conn.close()
+    print(f"  size now {os.path.getsize(db_path) / 1e6:.1f} MB")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add trade_date, covering index, tickers table and statistics to candle shards")
+    parser.add_argument('paths', nargs='*', help='Shard files (default: every stock_data_*.db in data/db)')
+    parser.add_argument('--page-size', type=int, default=8192, help='Page size applied by VACUUM')
+    parser.add_argument('--no-vacuum', action='store_true', help='Skip the VACUUM step')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    paths = args.paths or sorted(glob.glob(os.path.join(DB_DIR, "stock_data_*.db")))
+    if not paths:
+        logging.error(f"No shard databases found in {DB_DIR}")
+        return 1
+    for db_path in paths:
+        optimize_shard(db_path, page_size=args.page_size, vacuum=not args.no_vacuum)
+    # Record the rewritten shards so the app does not have to rescan them
+    for db_dir in sorted({os.path.dirname(os.path.abspath(db_path)) for db_path in paths}):
+        ShardManifest(db_dir).refresh()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
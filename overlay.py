@@ -0,0 +1,57 @@
+"""Multi-ticker overlay series aligned on one shared timestamp axis.
+
+The axis is the sorted union of every ticker's bar timestamps; a ticker
+with no bar at some timestamp gets NaN there (null in JSON). With
+normalize=True prices are expressed as percent change from the ticker's
+first open in the requested window.
+"""
+import numpy as np
+
+from chart_wire import encode_columns
+
+OVERLAY_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+def align_overlay(frames, normalize=False):
+    """frames: {ticker: chart DataFrame} -> (datetime64[s] axis, {ticker: {column: float64 array}})"""
+    stamps = {ticker: df['timestamp'].to_numpy(dtype='datetime64[ns]').astype('datetime64[s]')
+              for ticker, df in frames.items()}
+    axis = np.unique(np.concatenate(list(stamps.values()))) if stamps else np.array([], dtype='datetime64[s]')
+    series = {}
+    for ticker, df in frames.items():
+        positions = np.searchsorted(axis, stamps[ticker])
+        columns = {}
+        for name in OVERLAY_COLUMNS:
+            column = np.full(len(axis), np.nan)
+            column[positions] = df[name].to_numpy(dtype=np.float64)
+            columns[name] = column
+        if normalize and len(df):
+            base = df['open'].iloc[0]
+            for name in PRICE_COLUMNS:
+                columns[name] = (columns[name] / base - 1.0) * 100.0
+        series[ticker] = columns
+    return axis, series
+
+def _nullable(values):
+    return [None if np.isnan(value) else value for value in values.tolist()]
+
+def overlay_dict(axis, series, normalize):
+    return {
+        'timestamp': [stamp.replace('T', ' ') for stamp in np.datetime_as_string(axis, unit='s').tolist()],
+        'tickers': list(series),
+        'series': {
+            ticker: {name: _nullable(values) for name, values in columns.items()}
+            for ticker, columns in series.items()
+        },
+        'normalized': normalize,
+        'count': len(axis)
+    }
+
+def encode_overlay_compact(axis, series, normalize):
+    """Compact payload with one timestamp column and <TICKER>.<column> float32 columns (NaN where missing)"""
+    columns = {'timestamp': axis.astype('<i4')}
+    for ticker, ticker_columns in series.items():
+        for name, values in ticker_columns.items():
+            columns[f"{ticker}.{name}"] = values.astype('<f8' if name == 'volume' else '<f4')
+    header = {'version': 1, 'tickers': list(series), 'normalized': normalize, 'count': len(axis)}
+    return encode_columns(columns, header)
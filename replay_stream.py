@@ -0,0 +1,117 @@
+"""Server-Sent Events replay of one stored trading day.
+
+The stream walks the day's 1-minute bars and, for each minute, emits the
+bar of the requested timeframe as it stands at that minute (a partial bar
+until its last minute has been replayed). Events:
+
+    event: meta    {"ticker", "date", "timeframe", "count", "cursor", "interval_ms"}
+    event: bar     {"i", "minute", "timestamp", "open", "high", "low", "close", "volume", "complete"}
+    event: pause   {"cursor"}    time budget used up; reconnect with ?cursor= to continue
+    event: end     {"cursor"}
+
+Every bar carries id: <minute index>, so a client pauses by closing the
+EventSource and resumes or seeks by reopening it with cursor=<index>
+(a browser reconnect sends Last-Event-ID, which resumes after that index).
+The generator only reads the shared, read-only day columns it is given;
+no per-client copy of the day is made.
+"""
+import json
+import time
+import numpy as np
+
+from candle_db import regular_session_bounds
+
+def frame_columns(df):
+    """Read-only epoch-second/OHLCV arrays for a candle DataFrame"""
+    columns = {
+        'timestamp': df['timestamp'].to_numpy(dtype='datetime64[ns]').astype('datetime64[s]').astype(np.int64),
+        'open': df['open'].to_numpy(dtype=np.float64),
+        'high': df['high'].to_numpy(dtype=np.float64),
+        'low': df['low'].to_numpy(dtype=np.float64),
+        'close': df['close'].to_numpy(dtype=np.float64),
+        'volume': df['volume'].to_numpy(dtype=np.float64)
+    }
+    for values in columns.values():
+        values.setflags(write=False)
+    return columns
+
+def session_bounds(timestamps, restrict_hours):
+    """Index range [lo, hi) of the replayed session within sorted epoch-second timestamps"""
+    if not restrict_hours:
+        return 0, len(timestamps)
+    return regular_session_bounds(timestamps)
+
+def cursor_for_time(timestamps, lo, hi, clock):
+    """Index of the first replayed minute at or after HH:MM on the replayed day"""
+    if hi <= lo:
+        return 0
+    day_start = timestamps[lo] - timestamps[lo] % 86400
+    hours, minutes = (int(part) for part in clock.split(':')[:2])
+    target = day_start + hours * 3600 + minutes * 60
+    return int(np.searchsorted(timestamps[lo:hi], target, side='left'))
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+def _clock(epoch_seconds):
+    return str(np.datetime64(int(epoch_seconds), 's')).replace('T', ' ')
+
+def replay_events(columns, lo, hi, timeframe, cursor, interval, max_seconds, header, sleep=time.sleep):
+    """Yield SSE messages replaying minutes [lo + cursor, hi) of the day columns"""
+    timestamps = columns['timestamp']
+    count = hi - lo
+    cursor = min(max(cursor, 0), count)
+    bucket_seconds = timeframe * 60
+    yield 'retry: 2000\n\n'
+    yield format_event('meta', dict(header, count=count, cursor=cursor, interval_ms=int(interval * 1000)))
+
+    # When seeking into the middle of a higher-timeframe bar, rebuild its partial state first
+    bar = None
+    if cursor < count:
+        bucket = timestamps[lo + cursor] // bucket_seconds
+        first = lo + cursor
+        while first > lo and timestamps[first - 1] // bucket_seconds == bucket:
+            first -= 1
+        if first < lo + cursor:
+            window = slice(first, lo + cursor)
+            bar = {
+                'bucket': bucket,
+                'open': float(columns['open'][first]),
+                'high': float(columns['high'][window].max()),
+                'low': float(columns['low'][window].min()),
+                'volume': float(columns['volume'][window].sum())
+            }
+
+    deadline = time.monotonic() + max_seconds
+    for i in range(lo + cursor, hi):
+        if i > lo + cursor and time.monotonic() >= deadline:
+            yield format_event('pause', {'cursor': i - lo})
+            return
+        bucket = timestamps[i] // bucket_seconds
+        if bar is None or bar['bucket'] != bucket:
+            bar = {'bucket': bucket, 'open': float(columns['open'][i]), 'high': float(columns['high'][i]),
+                   'low': float(columns['low'][i]), 'volume': 0.0}
+        else:
+            bar['high'] = max(bar['high'], float(columns['high'][i]))
+            bar['low'] = min(bar['low'], float(columns['low'][i]))
+        bar['volume'] += float(columns['volume'][i])
+        complete = i + 1 >= hi or timestamps[i + 1] // bucket_seconds != bucket
+        yield format_event('bar', {
+            'i': i - lo,
+            'minute': _clock(timestamps[i]),
+            'timestamp': _clock(bucket * bucket_seconds),
+            'open': bar['open'],
+            'high': bar['high'],
+            'low': bar['low'],
+            'close': float(columns['close'][i]),
+            'volume': bar['volume'],
+            'complete': bool(complete)
+        }, event_id=i - lo)
+        if i + 1 < hi:
+            sleep(interval)
+    yield format_event('end', {'cursor': count})
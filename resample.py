@@ -0,0 +1,72 @@
+"""OHLCV resampling with NumPy reduceat.
+
+Bucket boundaries come from integer minute offsets, and each column is
+aggregated in one pass: first open, max high, min low, last close, summed
+volume. Buckets are aligned to midnight, which matches
+DataFrame.resample(f'{timeframe}T') for every chart timeframe (all of them
+divide a day evenly), and empty buckets are never produced, which matches
+the .dropna() that followed it. Input with missing prices goes through the
+pandas reference path so NaN handling stays identical.
+"""
+import numpy as np
+import pandas as pd
+
+def bucket_starts(timestamps, timeframe):
+    """Return (bucket start epoch seconds, index of first row of each bucket) for sorted epoch-second timestamps"""
+    bucket_seconds = timeframe * 60
+    buckets = timestamps // bucket_seconds
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    return buckets[starts] * bucket_seconds, starts
+
+def resample_ohlcv(timestamps, open_, high, low, close, volume, timeframe):
+    """Aggregate sorted 1-minute columns into timeframe-minute bars, returned as a dict of arrays"""
+    if len(timestamps) == 0:
+        return {
+            'timestamp': np.asarray(timestamps, dtype=np.int64)[:0],
+            'open': np.asarray(open_)[:0], 'high': np.asarray(high)[:0], 'low': np.asarray(low)[:0],
+            'close': np.asarray(close)[:0], 'volume': np.asarray(volume)[:0]
+        }
+    bar_times, starts = bucket_starts(np.asarray(timestamps, dtype=np.int64), timeframe)
+    ends = np.concatenate((starts[1:], [len(timestamps)])) - 1
+    bars = {
+        'timestamp': bar_times,
+        'open': np.asarray(open_)[starts],
+        'high': np.maximum.reduceat(np.asarray(high), starts),
+        'low': np.minimum.reduceat(np.asarray(low), starts),
+        'close': np.asarray(close)[ends],
+        'volume': np.add.reduceat(np.asarray(volume), starts)
+    }
+    return bars
+
+def to_epoch_seconds(timestamps):
+    """datetime64 Series/array -> int64 epoch seconds"""
+    return np.asarray(timestamps, dtype='datetime64[ns]').astype('datetime64[s]').astype(np.int64)
+
+def resample_frame_pandas(df, timeframe):
+    """Reference pandas aggregation, used when prices contain NaN (pandas skips them per bucket)"""
+    df = df.set_index('timestamp')
+    df = df.resample(f'{timeframe}min').agg({
+        'open': 'first',
+        'high': 'max',
+        'low': 'min',
+        'close': 'last',
+        'volume': 'sum'
+    }).dropna()
+    return df.reset_index()
+
+def resample_frame(df, timeframe):
+    """DataFrame version of resample_ohlcv, taking and returning the chart candle columns"""
+    prices = {name: df[name].to_numpy(dtype=np.float64) for name in ('open', 'high', 'low', 'close')}
+    if any(np.isnan(values).any() for values in prices.values()):
+        return resample_frame_pandas(df, timeframe)
+    volume = df['volume'].to_numpy()
+    if volume.dtype == object:
+        volume = volume.astype(np.float64)
+    bars = resample_ohlcv(
+        to_epoch_seconds(df['timestamp']),
+        prices['open'], prices['high'], prices['low'], prices['close'],
+        volume,
+        timeframe
+    )
+    bars['timestamp'] = pd.to_datetime(bars['timestamp'], unit='s')
+    return pd.DataFrame(bars)
@@ -0,0 +1,144 @@
+"""Materialized multi-timeframe rollups of the 1-minute candles.
+
+History never changes, so every chart timeframe above one minute is
+aggregated once per ticker and day, for both the full session and the
+9:30-16:00 regular session, and stored in data/db/rollups_<ticker>.db.
+get_chart reads these bars directly and only resamples live when a day has
+not been rolled up yet.
+
+    python rollups.py build [TICKER ...]           # roll up days not yet stored
+    python rollups.py build QQQ --rebuild          # recompute every day
+"""
+import os
+import sys
+import logging
+import argparse
+import pandas as pd
+
+from candle_db import (
+    DB_DIR, TICKERS, CHART_TIMEFRAMES, get_db_paths, candle_pool,
+    load_day_candles_sqlite, filter_regular_hours, resample_candles, writable_copy
+)
+from shard_manifest import ShardManifest
+from date_catalog import DateCatalog
+
+ROLLUP_TIMEFRAMES = [timeframe for timeframe in CHART_TIMEFRAMES if timeframe > 1]
+
+ROLLUP_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rollups (
+        ticker TEXT NOT NULL,
+        trade_date TEXT NOT NULL,
+        timeframe INTEGER NOT NULL,
+        regular_hours INTEGER NOT NULL,
+        timestamp TEXT NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume INTEGER,
+        PRIMARY KEY (ticker, trade_date, timeframe, regular_hours, timestamp)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS rollup_days (
+        ticker TEXT NOT NULL,
+        trade_date TEXT NOT NULL,
+        PRIMARY KEY (ticker, trade_date)
+    ) WITHOUT ROWID;
+"""
+
+ROLLUP_QUERY = """
+    SELECT timestamp, open, high, low, close, volume
+    FROM rollups
+    WHERE ticker = ? AND trade_date = ? AND timeframe = ? AND regular_hours = ?
+    ORDER BY timestamp
+"""
+
+def rollup_db_path(ticker, db_dir=DB_DIR):
+    return os.path.join(db_dir, f"rollups_{ticker.lower()}.db")
+
+def compute_day_rollups(df):
+    """Return rollup rows (timeframe, regular_hours, timestamp, o, h, l, c, v) for one day of 1-minute candles"""
+    rows = []
+    sessions = {0: df, 1: filter_regular_hours(df)}
+    for regular_hours, session_df in sessions.items():
+        for timeframe in ROLLUP_TIMEFRAMES:
+            bars = resample_candles(session_df, timeframe)
+            timestamps = bars['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+            rows.extend(zip(
+                [timeframe] * len(bars), [regular_hours] * len(bars), timestamps,
+                bars['open'], bars['high'], bars['low'], bars['close'], bars['volume']
+            ))
+    return rows
+
+def build_rollups(ticker, dates=None, db_dir=DB_DIR, rebuild=False, log_every=50):
+    """Materialize rollups for the given dates (default: every stored date not yet rolled up)
+
+    The app reads rollup files with immutable=1, so the build runs on a private
+    copy that replaces the live file only once every day has been written.
+    """
+    manifest = ShardManifest(db_dir)
+    db_paths = get_db_paths(ticker)
+    if dates is None:
+        dates = DateCatalog().dates(ticker) or []
+    with writable_copy(rollup_db_path(ticker, db_dir)) as conn:
+        conn.executescript(ROLLUP_SCHEMA)
+        done = set()
+        if not rebuild:
+            done = {row[0] for row in conn.execute("SELECT trade_date FROM rollup_days WHERE ticker = ?", (ticker,))}
+        pending = [str(date) for date in dates if str(date) not in done]
+        logging.info(f"Rolling up {len(pending)} days for {ticker}")
+        conn.execute("BEGIN")
+        for i, date in enumerate(pending, 1):
+            df = load_day_candles_sqlite(ticker, date, manifest.shards_for_date(ticker, db_paths, date))
+            rows = compute_day_rollups(df)
+            conn.execute("DELETE FROM rollups WHERE ticker = ? AND trade_date = ?", (ticker, date))
+            conn.executemany(
+                "INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(ticker, date) + row for row in rows]
+            )
+            conn.execute("INSERT OR REPLACE INTO rollup_days (ticker, trade_date) VALUES (?, ?)", (ticker, date))
+            if i % log_every == 0:
+                logging.info(f"{ticker}: {i}/{len(pending)} days rolled up")
+        conn.execute("COMMIT")
+    return len(pending)
+
+def load_rollup(ticker, target_date, timeframe, regular_hours, db_dir=DB_DIR):
+    """Return the precomputed bars for one day, or None when the day has not been rolled up"""
+    path = rollup_db_path(ticker, db_dir)
+    if timeframe not in ROLLUP_TIMEFRAMES or not os.path.exists(path):
+        return None
+    try:
+        with candle_pool.connection(path) as conn:
+            if conn.execute("SELECT 1 FROM rollup_days WHERE ticker = ? AND trade_date = ?",
+                            (ticker, str(target_date))).fetchone() is None:
+                return None
+            df = pd.read_sql_query(ROLLUP_QUERY, conn, params=(ticker, str(target_date), timeframe, int(regular_hours)),
+                                   parse_dates=['timestamp'])
+        # Rollup files built before volume was an INTEGER column hold it as REAL; serve ints like the 1-minute path
+        if df['volume'].notna().all():
+            df['volume'] = df['volume'].astype('int64')
+        return df
+    except Exception as e:
+        logging.warning(f"Could not read rollup for {ticker} on {target_date}: {str(e)}")
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Materialize multi-timeframe candle rollups")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='Roll up stored days for some or all tickers')
+    build_parser.add_argument('tickers', nargs='*', help='Tickers to roll up (default: all)')
+    build_parser.add_argument('--rebuild', action='store_true', help='Recompute days that are already rolled up')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    for ticker in args.tickers or TICKERS:
+        if ticker not in TICKERS:
+            logging.error(f"Invalid ticker requested: {ticker}")
+            return 1
+        if not get_db_paths(ticker):
+            logging.warning(f"No database files found for {ticker}, skipping")
+            continue
+        build_rollups(ticker, rebuild=args.rebuild)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Date-range manifest of the candle shard databases.
+
+Records, for every stock_data_*.db file, the first and last trading date and
+the row count of each ticker it holds, so a query for one date only touches
+the shard that contains it. Entries are keyed by file and invalidated by
+mtime and size. The manifest is persisted next to the shards by the offline
+tools (this script, optimize_db.py, ingest.py); the app only rescans stale
+shards in memory, so concurrent workers never write the file:
+
+    python shard_manifest.py            # rebuild and print the manifest
+"""
+import os
+import sys
+import glob
+import json
+import logging
+import argparse
+import tempfile
+import threading
+
+from candle_db import DB_DIR, candle_pool, shard_features
+
+MANIFEST_FILENAME = "shard_manifest.json"
+
+def scan_shard(db_path):
+    """Compute the per-ticker date range and row count of one shard"""
+    stat = os.stat(db_path)
+    with candle_pool.connection(db_path) as conn:
+        if shard_features(conn, db_path)['tickers_table']:
+            rows = conn.execute("SELECT ticker, first_date, last_date, row_count FROM tickers").fetchall()
+        else:
+            rows = conn.execute("""
+                SELECT ticker, substr(MIN(timestamp), 1, 10), substr(MAX(timestamp), 1, 10), COUNT(*)
+                FROM candles
+                GROUP BY ticker
+            """).fetchall()
+    return {
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'tickers': {
+            ticker: {'min_date': min_date, 'max_date': max_date, 'rows': count}
+            for ticker, min_date, max_date, count in rows
+        }
+    }
+
+class ShardManifest:
+    def __init__(self, db_dir=DB_DIR, persist=True):
+        self.db_dir = db_dir
+        self.persist = persist
+        self.path = os.path.join(db_dir, MANIFEST_FILENAME)
+        self._lock = threading.Lock()
+        self._shards = None
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('shards', {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_path = None
+        try:
+            # A unique temp file per writer, so concurrent writers never share one before the atomic replace
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{MANIFEST_FILENAME}.", suffix='.tmp', dir=self.db_dir)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'shards': self._shards}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not write shard manifest {self.path}: {str(e)}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _is_current(entry, db_path):
+        try:
+            stat = os.stat(db_path)
+        except OSError:
+            return False
+        return entry is not None and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size
+
+    def refresh(self, db_paths=None):
+        """Rescan shards whose file changed since the manifest was written"""
+        if db_paths is None:
+            db_paths = sorted(glob.glob(os.path.join(self.db_dir, "stock_data_*.db")))
+        with self._lock:
+            if self._shards is None:
+                self._shards = self._load()
+            changed = False
+            for db_path in db_paths:
+                name = os.path.basename(db_path)
+                if self._is_current(self._shards.get(name), db_path):
+                    continue
+                try:
+                    self._shards[name] = scan_shard(db_path)
+                    changed = True
+                    logging.info(f"Scanned shard {name} for manifest")
+                except Exception as e:
+                    logging.warning(f"Could not scan shard {db_path}: {str(e)}")
+                    self._shards.pop(name, None)
+            if changed and self.persist:
+                self._save()
+
+    def _entry(self, db_path):
+        entry = (self._shards or {}).get(os.path.basename(db_path))
+        if not self._is_current(entry, db_path):
+            self.refresh([db_path])
+            entry = self._shards.get(os.path.basename(db_path))
+        return entry
+
+    def shard_range(self, ticker, db_path):
+        """Return {'min_date', 'max_date', 'rows'} for a ticker in a shard, or None if unknown"""
+        entry = self._entry(db_path)
+        if entry is None:
+            return None
+        return entry['tickers'].get(ticker, {'min_date': None, 'max_date': None, 'rows': 0})
+
+    def shards_for_range(self, ticker, db_paths, start_date, end_date):
+        """Filter db_paths to the shards whose date range overlaps [start_date, end_date]"""
+        start_date, end_date = str(start_date), str(end_date)
+        selected = []
+        for db_path in db_paths:
+            info = self.shard_range(ticker, db_path)
+            if info is None:
+                # Unknown shard: keep it so the query stays correct
+                selected.append(db_path)
+            elif info['rows'] and info['min_date'] <= end_date and info['max_date'] >= start_date:
+                selected.append(db_path)
+        return selected
+
+    def shards_for_date(self, ticker, db_paths, target_date):
+        return self.shards_for_range(ticker, db_paths, target_date, target_date)
+
+    def summary(self):
+        with self._lock:
+            return dict(self._shards or {})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the candle shard manifest")
+    parser.add_argument('--db-dir', default=DB_DIR, help='Directory holding the stock_data_*.db shards')
+    parser.add_argument('--force', action='store_true', help='Rescan every shard even if unchanged')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    manifest = ShardManifest(args.db_dir)
+    if args.force:
+        manifest._shards = {}
+    manifest.refresh()
+    for name, entry in sorted(manifest.summary().items()):
+        for ticker, info in sorted(entry['tickers'].items()):
+            print(f"{name:<32} {ticker:<6} {info['min_date']} .. {info['max_date']}  {info['rows']:>10} rows")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
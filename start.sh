@@ -22,5 +22,6 @@ ls -la "$DATA_DIR"
 echo "Contents of $DATA_DIR/db:"
 ls -la "$DATA_DIR/db"
 
-# Start the application
-gunicorn --bind 0.0.0.0:$PORT app:app
\ No newline at end of file
+# Start the application. Threaded workers: a replay stream (SSE) holds one thread for
+# up to REPLAY_STREAM_MAX_SECONDS, and the gthread worker's heartbeat does not time it out
+gunicorn --bind 0.0.0.0:$PORT --worker-class gthread --threads ${GUNICORN_THREADS:-8} app:app
\ No newline at end of file
@@ -290,6 +290,70 @@ let measurementTool = {
     earnings: { isActive: false, startPoint: null, endPoint: null, line: null, overlay: null, crosshairListener: null, clickListener: null }
 };
 
+// Compact chart wire format (see chart_wire.py): magic, header length, JSON
+// header, then 8-byte aligned little-endian column buffers
+const COMPACT_CHART_CONTENT_TYPE = 'application/vnd.onemchart.ohlcv';
+// Off until float32 prices (about 7 significant digits) are accepted in place of the JSON doubles
+const USE_COMPACT_CHART_FORMAT = false;
+const COMPACT_DTYPES = {
+    int32: Int32Array,
+    uint32: Uint32Array,
+    float32: Float32Array,
+    float64: Float64Array
+};
+
+function chartAcceptHeader() {
+    return USE_COMPACT_CHART_FORMAT ? `${COMPACT_CHART_CONTENT_TYPE}, application/json;q=0.9` : 'application/json';
+}
+
+function formatEpochSeconds(seconds) {
+    // Timestamps are exchange wall-clock time encoded as if UTC
+    return new Date(seconds * 1000).toISOString().slice(0, 19).replace('T', ' ');
+}
+
+function decodeCompactChart(buffer) {
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== 'OMC1') {
+        throw new Error('Unexpected chart payload');
+    }
+    const headerLength = new DataView(buffer).getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+    const dataStart = Math.ceil((8 + headerLength) / 8) * 8;
+    const columns = {};
+    header.columns.forEach(column => {
+        const ArrayType = COMPACT_DTYPES[column.dtype];
+        columns[column.name] = new ArrayType(buffer, dataStart + column.offset, header.count);
+    });
+    // float32 keeps ~7 significant digits; trim the binary noise off prices
+    const price = value => parseFloat(value.toPrecision(7));
+    const chartData = {};
+    Object.keys(header).forEach(key => {
+        if (key !== 'columns' && key !== 'version') chartData[key] = header[key];
+    });
+    chartData.timestamp = Array.from(columns.timestamp, formatEpochSeconds);
+    chartData.open = Array.from(columns.open, price);
+    chartData.high = Array.from(columns.high, price);
+    chartData.low = Array.from(columns.low, price);
+    chartData.close = Array.from(columns.close, price);
+    chartData.volume = Array.from(columns.volume);
+    header.columns.forEach(column => {
+        if (column.name.startsWith('indicator.')) {
+            chartData.indicators = chartData.indicators || {};
+            chartData.indicators[column.name.slice('indicator.'.length)] =
+                Array.from(columns[column.name], value => (Number.isNaN(value) ? null : value));
+        }
+    });
+    return { chart_data: chartData };
+}
+
+async function readChartResponse(response) {
+    const contentType = response.headers.get('Content-Type') || '';
+    if (contentType.startsWith(COMPACT_CHART_CONTENT_TYPE)) {
+        return decodeCompactChart(await response.arrayBuffer());
+    }
+    return response.json();
+}
+
 function aggregateCandles(data, timeframe) {
     if (timeframe === 1) {
         return data.timestamp.map((_, i) => ({
@@ -1499,7 +1563,8 @@ function calculateMACD(data, fastPeriod = 12, slowPeriod = 26, signalPeriod = 9)
         });
     }
     
-    const signalLine = calculateEMA(macdLine, signalPeriod);
+    // calculateEMA reads .close, so feed it the MACD values under that name
+    const signalLine = calculateEMA(macdLine.map(d => ({ time: d.time, close: d.value })), signalPeriod);
     const histogram = [];
     
     for (let i = 0; i < signalLine.length; i++) {
@@ -2774,7 +2839,7 @@ async function loadChart(event, tabId) {
         const response = await fetch(url, {
             method: 'GET',
             headers: {
-                'Accept': 'application/json',
+                'Accept': chartAcceptHeader(),
                 'Content-Type': 'application/json'
             }
         });
@@ -2842,7 +2907,7 @@ async function loadChart(event, tabId) {
             const errorText = await response.text();
             throw new Error(`HTTP error! Status: ${response.status}, Message: ${errorText}`);
         }
-        const data = await response.json();
+        const data = await readChartResponse(response);
         if (data.error) {
             console.error('Chart error:', data.error);
             chartContainer.innerHTML = `<p>${data.error}</p>`;